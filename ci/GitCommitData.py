@@ -54,6 +54,19 @@ class GitCommitData(object):
         """
         Creates up to the branch.
         """
+        # Most of the time the branch already exists so try to get
+        # the user, repo and branch in a single query first.
+        branch = models.Branch.objects.select_related('repository__user').filter(
+                repository__user__server=self.server,
+                repository__user__name=self.owner,
+                repository__name=self.repo,
+                name=self.ref).first()
+        if branch:
+            self.branch_record, self.branch_created = branch, False
+            self.repo_record, self.repo_created = branch.repository, False
+            self.user_record, self.user_created = branch.repository.user, False
+            return
+
         self.user_record, self.user_created = models.GitUser.objects.get_or_create(name=self.owner, server=self.server)
         if self.user_created:
             logger.info("Created %s user %s:%s" % (self.server.name, self.user_record.name, self.user_record.build_key))
@@ -74,13 +87,58 @@ class GitCommitData(object):
           The models.Commit that is created.
         """
         self.create_branch()
-        self.commit_record, self.commit_created = models.Commit.objects.get_or_create(branch=self.branch_record, sha=self.sha)
+        return self._create_commit()
+
+    @staticmethod
+    def create_pair(base, head):
+        """
+        Same as calling create() on both base and head but the lookups are shared.
+        If they are on the same branch then the branch is only looked up once, and
+        commits that already exist are fetched with a single query.
+        Input:
+          base[GitCommitData]: Base commit
+          head[GitCommitData]: Head commit
+        Return:
+          (models.Commit, models.Commit): The base and head commits
+        """
+        base.create_branch()
+        if (head.server == base.server and head.owner == base.owner
+                and head.repo == base.repo and head.ref == base.ref):
+            # Only base is responsible for removing these if they were created
+            head.user_record, head.user_created = base.user_record, False
+            head.repo_record, head.repo_created = base.repo_record, False
+            head.branch_record, head.branch_created = base.branch_record, False
+        else:
+            head.create_branch()
+
+        existing = {}
+        q = models.Commit.objects.filter(branch__in=[base.branch_record, head.branch_record],
+                sha__in=[base.sha, head.sha])
+        for c in q:
+            existing[(c.branch_id, c.sha)] = c
+        base._create_commit(existing.get((base.branch_record.pk, base.sha)))
+        head._create_commit(existing.get((head.branch_record.pk, head.sha)))
+        return base.commit_record, head.commit_record
+
+    def _create_commit(self, commit=None):
+        """
+        Creates the commit after the branch has been created.
+        Input:
+          commit[models.Commit]: The commit if it is already known to exist
+        Return:
+          The models.Commit
+        """
+        if commit is not None:
+            self.commit_record, self.commit_created = commit, False
+        else:
+            self.commit_record, self.commit_created = models.Commit.objects.get_or_create(branch=self.branch_record,
+                    sha=self.sha,
+                    defaults={"ssh_url": self.ssh_url})
         if self.commit_created:
             logger.info("Created %s commit %s" % (self.server.name, str(self.commit_record)))
-
-        if not self.commit_record.ssh_url and self.ssh_url:
+        elif not self.commit_record.ssh_url and self.ssh_url:
+            models.Commit.objects.filter(pk=self.commit_record.pk, ssh_url='').update(ssh_url=self.ssh_url)
             self.commit_record.ssh_url = self.ssh_url
-            self.commit_record.save()
 
         return self.commit_record
 
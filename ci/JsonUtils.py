@@ -0,0 +1,74 @@
+
+# Copyright 2016 Battelle Energy Alliance, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals, absolute_import
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    """
+    Used by orjson for types that it doesn't handle natively (or that
+    we want serialized the same way as Django does, like datetimes).
+    """
+    return DjangoJSONEncoder().default(obj)
+
+def dumps(data, indent=False):
+    """
+    Serialize data to a JSON string.
+    Uses orjson if it is available, otherwise the standard json module.
+    Input:
+      data: Object to serialize
+      indent[bool]: Whether to pretty print the output
+    Return:
+      str: The JSON string
+    """
+    return _dumps_bytes(data, indent).decode("utf-8")
+
+def _dumps_bytes(data, indent=False):
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    if indent:
+        out = json.dumps(data, indent=2, cls=DjangoJSONEncoder)
+    else:
+        out = json.dumps(data, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return out.encode("utf-8")
+
+def loads(data):
+    """
+    Deserialize a JSON string or bytes.
+    Raises ValueError on bad JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+class JsonResponse(HttpResponse):
+    """
+    Replacement for django.http.JsonResponse that serializes
+    with orjson when available and doesn't pretty print.
+    """
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super(JsonResponse, self).__init__(content=_dumps_bytes(data), **kwargs)
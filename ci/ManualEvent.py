@@ -14,7 +14,7 @@
 # limitations under the License.
 
 from __future__ import unicode_literals, absolute_import
-from ci import models, GitCommitData
+from ci import models, GitCommitData, event
 import logging
 logger = logging.getLogger('ci')
 
@@ -52,20 +52,18 @@ class ManualEvent(object):
             )
         base = base_commit.create()
 
-        recipes = models.Recipe.objects.filter(active=True,
-                current=True,
-                build_user=self.user,
+        recipes = models.Recipe.objects.for_event(self.user,
                 branch=base.branch,
                 cause=models.Recipe.CAUSE_MANUAL,
                 activate_label=self.activate_label,
-                ).order_by('-priority', 'display_name').all()
+                )
 
         if not recipes:
             if self.activate_label:
-                logger.info("No manual recipes on %s for %s with label '%s'" % (
-                    base.branch, self.user, self.activate_label))
+                logger.info("No manual recipes on %s for %s with label '%s'",
+                    base.branch, self.user, self.activate_label)
             else:
-                logger.info("No manual recipes on %s for %s" % (base.branch, self.user))
+                logger.info("No manual recipes on %s for %s", base.branch, self.user)
             base_commit.remove()
             return
 
@@ -76,14 +74,14 @@ class ManualEvent(object):
                 head=base,
                 base=base,
                 cause=models.Event.MANUAL,
-                duplicates=0)
+                duplicates=0,
+                defaults={"complete": False,
+                    "update_branch_status": update_branch_status,
+                    "description": "(scheduled)",
+                    })
 
         if created:
-            ev.complete = False
-            ev.update_branch_status = update_branch_status
-            ev.description = '(scheduled)'
-            ev.save()
-            logger.info("Created manual event on %s for %s" % (self.branch, self.user))
+            logger.info("Created manual event on %s for %s", self.branch, self.user)
         elif self.force:
             last_ev = models.Event.objects.filter(build_user=self.user,
                     head=base,
@@ -95,14 +93,13 @@ class ManualEvent(object):
                     head=base,
                     base=base,
                     cause=models.Event.MANUAL,
-                    duplicates=duplicate)
-            ev.complete = False
-            ev.update_branch_status = update_branch_status
-            ev.description = '(forced scheduled)'
-            ev.save()
-            logger.info("Created duplicate scheduled event #%s on %s for %s" % (duplicate, self.branch, self.user))
+                    duplicates=duplicate,
+                    complete=False,
+                    update_branch_status=update_branch_status,
+                    description='(forced scheduled)')
+            logger.info("Created duplicate scheduled event #%s on %s for %s", duplicate, self.branch, self.user)
         else:
-            logger.info("Scheduled event on %s for %s already exists: %s" % (self.branch, self.user, ev))
+            logger.info("Scheduled event on %s for %s already exists: %s", self.branch, self.user, ev)
 
         self._process_recipes(ev, recipes)
 
@@ -113,24 +110,22 @@ class ManualEvent(object):
           ev: models.Event
           recipes: Iterable of recipes to process.
         """
-        existing_recipes = []
-        for j in ev.jobs.all():
-            existing_recipes.append(j.recipe.filename)
+        existing_recipes = set(ev.jobs.values_list('recipe__filename', flat=True))
+        # We don't want to mess around with any jobs that have the same recipe
+        # (or other versions of the recipe)
+        recipes = [r for r in recipes if r.active and r.filename not in existing_recipes]
+        event.prefetch_build_configs(recipes)
 
+        new_jobs = []
         for r in recipes:
-            if r.filename in existing_recipes or not r.active:
-                # We don't want to mess around with any jobs that have the same recipe
-                # (or other versions of the recipe)
-                continue
-            for config in r.build_configs.order_by("name").all():
-                job, created = models.Job.objects.get_or_create(recipe=r, event=ev, config=config)
-                if created:
-                    job.ready = False
-                    job.complete = False
-                    if r.automatic == models.Recipe.MANUAL:
-                        job.active = False
-                        job.status = models.JobStatus.ACTIVATION_REQUIRED
-                    job.save()
-                    logger.info('Created job {}: {} on {}'.format(job.pk, job, r.repository))
+            for config in r.build_configs.all():
+                job = models.Job(recipe=r, event=ev, config=config, ready=False, complete=False)
+                if r.automatic == models.Recipe.MANUAL:
+                    job.active = False
+                    job.status = models.JobStatus.ACTIVATION_REQUIRED
+                new_jobs.append(job)
+
+        for job in event.create_jobs(ev, new_jobs):
+            logger.info('Created job %s: %s on %s', job.pk, job, job.recipe.repository)
 
         ev.make_jobs_ready()
@@ -125,11 +125,12 @@ def can_see_results(session, recipe):
 
     # if viewable_by_teams was specified we check if
     # the signed in user is a member of one of the teams
-    for team in recipe.viewable_by_teams.all():
+    teams = list(recipe.viewable_by_teams.all())
+    for team in teams:
         if team == signed_in.name or is_team_member(session, api, team.team, signed_in):
             return True
 
-    if recipe.viewable_by_teams.count():
+    if teams:
         return False
 
     # No viewable_by_teams was specified. They need to be
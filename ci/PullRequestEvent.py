@@ -14,7 +14,7 @@
 # limitations under the License.
 
 from __future__ import unicode_literals, absolute_import
-from ci import models, Permissions, event
+from ci import models, Permissions, event, GitCommitData
 from django.urls import reverse
 import traceback
 import logging
@@ -68,7 +68,7 @@ class PullRequestEvent(object):
 
         if self.action == self.CLOSED and not pr.closed:
             pr.closed = True
-            logger.info('{}: Closed pull request {}: {}'.format(base.branch, pr.pk, pr))
+            logger.info('%s: Closed pull request %s: %s', base.branch, pr.pk, pr)
             pr.save()
 
     def _get_recipes_with_deps(self, recipe_q):
@@ -78,30 +78,30 @@ class PullRequestEvent(object):
         return recipes
 
     def _get_recipes(self, base, matched, matched_all):
-        recipes_q = models.Recipe.objects.filter(
-            active=True,
-            current=True,
-            build_user=self.build_user,
-            repository=base.branch.repository,
-            ).order_by('-priority', 'display_name')
+        recipes_q = models.Recipe.objects.for_event(self.build_user,
+            repository=base.branch.repository)
+        # These are all used when creating the jobs
+        recipes_q = recipes_q.select_related('build_user').prefetch_related('auto_authorized', 'depends_on')
         recipes = []
         if matched:
             # If there are no labels for the match then we do the default
-            logger.info('PR #%s on %s matched labels: %s' % (self.pr_number, base.branch.repository,
-                matched))
+            logger.info('PR #%s on %s matched labels: %s', self.pr_number, base.branch.repository,
+                matched)
             recipes_matched = recipes_q.filter(
                     cause__in=[models.Recipe.CAUSE_PULL_REQUEST_ALT, models.Recipe.CAUSE_PULL_REQUEST],
                     activate_label__in=matched)
-            if recipes_matched.count():
+            if recipes_matched:
                 # This will be added to the recipes automatically
                 recipes = self._get_recipes_with_deps(recipes_matched)
                 if matched_all:
                     # these are all the ones we are going to do
                     return recipes
             else:
-                logger.info('Matched labels but no recipes for labels, using default: %s' % matched)
+                logger.info('Matched labels but no recipes for labels, using default: %s', matched)
+        seen = set(r.pk for r in recipes)
         for r in recipes_q.filter(cause=models.Recipe.CAUSE_PULL_REQUEST).all():
-            if r not in recipes:
+            if r.pk not in seen:
+                seen.add(r.pk)
                 recipes.append(r)
         return recipes
 
@@ -112,14 +112,14 @@ class PullRequestEvent(object):
           base: models.Commit for the base(upstream) repo
           head: models.Commit for the head(development) repo
         """
-        logger.info('New pull request event: PR #{} on {} for {}'.format(self.pr_number,
+        logger.info('New pull request event: PR #%s on %s for %s', self.pr_number,
             base.branch.repository,
-            self.build_user))
+            self.build_user)
         matched, matched_all = event.get_active_labels(base.repo(), self.changed_files)
         recipes = self._get_recipes(base, matched, matched_all)
 
         if not recipes:
-            logger.info("No recipes for PRs on {} for {}".format(base.branch.repository, self.build_user))
+            logger.info("No recipes for PRs on %s for %s", base.branch.repository, self.build_user)
             return None, None, None
 
         pr, pr_created = models.PullRequest.objects.get_or_create(
@@ -131,39 +131,37 @@ class PullRequestEvent(object):
         pr.url = self.html_url
         pr.username = self.trigger_user
         pr.review_comments_url = self.review_comments_url
+        if not pr.username:
+            pr.username = head.user().name
         pr.save()
         pr.repository.active = True
         pr.repository.save()
         if not pr_created:
-            logger.info('Pull request {}: {} already exists'.format(pr.pk, pr))
+            logger.info('Pull request %s: %s already exists', pr.pk, pr)
         else:
-            logger.info('Pull request created {}: {}'.format(pr.pk, pr))
+            logger.info('Pull request created %s: %s', pr.pk, pr)
 
-        ev, ev_created = models.Event.objects.get_or_create(
+        ev, ev_created = models.Event.objects.update_or_create(
             build_user=self.build_user,
             head=head,
             base=base,
+            defaults={"complete": False,
+                "cause": models.Event.PULL_REQUEST,
+                "comments_url": self.comments_url,
+                "description": self.description,
+                "trigger_user": self.trigger_user,
+                "changed_files": models.Event.encode_changed_files(self.changed_files),
+                "pull_request": pr,
+                "json_data": models.Event.encode_json_data(self.full_text),
+                },
             )
-
-        ev.complete = False
-        ev.cause = models.Event.PULL_REQUEST
-        ev.comments_url = self.comments_url
-        ev.description = self.description
-        ev.trigger_user = self.trigger_user
-        ev.set_changed_files(self.changed_files)
-        if not pr.username:
-            pr.username = ev.head.user().name
-            pr.save()
-        ev.pull_request = pr
-        ev.set_json_data(self.full_text)
-        ev.save()
         if not ev_created:
-            logger.info('Event {}: {} : {} already exists'.format(ev.pk, ev.base, ev.head))
+            logger.info('Event %s: %s : %s already exists', ev.pk, ev.base, ev.head)
             recipes = []
             for j in ev.jobs.all():
                 recipes.append(j.recipe)
         else:
-            logger.info('Event created {}: {} : {}'.format(ev.pk, ev.base, ev.head))
+            logger.info('Event created %s: %s : %s', ev.pk, ev.base, ev.head)
 
         if not pr_created and ev_created:
             # Cancel all the previous events on this pull request
@@ -198,13 +196,30 @@ class PullRequestEvent(object):
           pr: models.PullRequest that we are processing
         """
         ev = pr.events.latest()
-        if pr.alternate_recipes.count() == 0 and not default_recipes:
-            logger.info("No additional recipes for pull request %s" % pr)
+        alt_recipes = list(pr.alternate_recipes.all())
+        if not alt_recipes and not default_recipes:
+            logger.info("No additional recipes for pull request %s", pr)
             return
-        all_recipes = default_recipes + [r for r in pr.alternate_recipes.all()]
+        all_recipes = default_recipes + alt_recipes
         self._create_jobs(pr, ev, all_recipes)
 
-    def _check_recipe(self, session, git_api, pr, ev, recipe):
+    def _get_trigger_user(self, pr, ev):
+        """
+        Get the user that triggered the PR.
+        Input:
+          pr: models.PullRequest that we are processing
+          ev: models.Event that is attached to this pull request
+        Return:
+          models.GitUser: If the user isn't in the DB then an unsaved GitUser is returned.
+            That is enough to check permissions and avoids creating and deleting a record.
+        """
+        server = pr.repository.user.server
+        try:
+            return models.GitUser.objects.get(name=ev.trigger_user, server=server)
+        except models.GitUser.DoesNotExist:
+            return models.GitUser(name=ev.trigger_user, server=server)
+
+    def _check_recipe(self, session, git_api, pr, ev, recipe, pr_user=None):
         """
         Check if an individual recipe is active for the PR.
         If it is not then set a comment on the PR saying that they
@@ -215,53 +230,49 @@ class PullRequestEvent(object):
           pr: models.PullRequest that we are processing
           ev: models.Event that is attached to this pull request
           recipe: models.Recipe that we need to process
+          pr_user[models.GitUser]: User that triggered the PR, from _get_trigger_user()
         """
         if not recipe.active:
             return []
         active = False
-        server = pr.repository.user.server
         if recipe.automatic == models.Recipe.FULL_AUTO:
             active = True
         elif recipe.automatic == models.Recipe.MANUAL:
             active = False
         elif recipe.automatic == models.Recipe.AUTO_FOR_AUTHORIZED:
-            if ev.trigger_user:
-                pr_user, created = models.GitUser.objects.get_or_create(name=ev.trigger_user,
-                        server=server)
+            if ev.trigger_user and pr_user is not None:
                 if pr_user in recipe.auto_authorized.all():
                     active = True
                 else:
                     active = Permissions.is_collaborator(session, recipe.build_user,
                             recipe.repository, user=pr_user)
                 if active:
-                    logger.info('User {} is allowed to activate recipe: {}: {}'.format(
-                        pr_user, recipe.pk, recipe))
+                    logger.info('User %s is allowed to activate recipe: %s: %s',
+                        pr_user, recipe.pk, recipe)
                 else:
-                    logger.info('User {} is NOT allowed to activate recipe {}: {}'.format(
-                        pr_user, recipe.pk, recipe))
-                if created:
-                    pr_user.delete()
+                    logger.info('User %s is NOT allowed to activate recipe %s: %s',
+                        pr_user, recipe.pk, recipe)
             else:
-                logger.info('Recipe: {}: {}: not activated because trigger_user is blank'.format(
-                    recipe.pk, recipe))
-
-        jobs = []
-        for config in recipe.build_configs.order_by("name").all():
-            job, created = models.Job.objects.get_or_create(recipe=recipe, event=ev, config=config)
-            if created:
-                job.active = active
-                job.ready = False
-                job.complete = False
-                if job.active:
-                    job.status = models.JobStatus.NOT_STARTED
-                else:
-                    job.status = models.JobStatus.ACTIVATION_REQUIRED
-                job.save()
-                logger.info('Created job {}: {}: on {}'.format(job.pk, job, recipe.repository))
-                jobs.append(job)
+                logger.info('Recipe: %s: %s: not activated because trigger_user is blank',
+                    recipe.pk, recipe)
 
+        existing = dict((j.config_id, j) for j in ev.jobs.filter(recipe=recipe).select_related('recipe', 'config'))
+        new_jobs = []
+        for config in recipe.build_configs.all():
+            job = existing.get(config.pk)
+            if job:
+                logger.info('Job %s: %s: on %s already exists', job.pk, job, recipe.repository)
+                continue
+            job = models.Job(recipe=recipe, event=ev, config=config, active=active, ready=False, complete=False)
+            if job.active:
+                job.status = models.JobStatus.NOT_STARTED
             else:
-                logger.info('Job {}: {}: on {} already exists'.format(job.pk, job, recipe.repository))
+                job.status = models.JobStatus.ACTIVATION_REQUIRED
+            new_jobs.append(job)
+
+        jobs = event.create_jobs(ev, new_jobs)
+        for job in jobs:
+            logger.info('Created job %s: %s: on %s', job.pk, job, recipe.repository)
         return jobs
 
     def _update_remote(self, git_api, ev, jobs):
@@ -273,18 +284,16 @@ class PullRequestEvent(object):
           git_api[GitAPI]: Git API for the build_user
           ev[models.Event]: Event that the jobs were created on
         """
-        server = ev.base.server()
+        # These are the same for every job so only look them up once
+        post_job_status = ev.base.server().post_job_status()
+        inactive = []
         for job in jobs:
             abs_job_url = job.absolute_url()
             msg = 'Waiting'
             git_status = git_api.PENDING
             if not job.active:
                 msg = 'Developer needed to activate'
-                if server.post_job_status():
-                    comment = 'A build job for {} from recipe {} is waiting for a developer' \
-                            ' to activate it here: {}'
-                    comment = comment.format(ev.head.sha, job.recipe.name, abs_job_url)
-                    git_api.pr_comment(ev.comments_url, comment)
+                inactive.append((job.recipe.name, abs_job_url))
 
             git_api.update_pr_status(
                 ev.base,
@@ -296,14 +305,23 @@ class PullRequestEvent(object):
                 git_api.STATUS_JOB_STARTED,
                 )
 
+        if post_job_status and inactive:
+            # One comment for all the jobs instead of one per job
+            if len(inactive) == 1:
+                comment = 'A build job for {} from recipe {} is waiting for a developer' \
+                        ' to activate it here: {}'.format(ev.head.sha, inactive[0][0], inactive[0][1])
+            else:
+                comment = 'Build jobs for {} are waiting for a developer to activate them:\n\n'.format(ev.head.sha)
+                comment += '\n'.join('- {}: {}'.format(name, url) for name, url in inactive)
+            git_api.pr_comment(ev.comments_url, comment)
+
 
     def save(self):
         """
         After the caller has set the variables for base_commit, head_commit, etc,
         this will actually create the records in the DB and get the jobs ready.
         """
-        base = self.base_commit.create()
-        head = self.head_commit.create()
+        base, head = GitCommitData.GitCommitData.create_pair(self.base_commit, self.head_commit)
 
         if self.action == self.CLOSED:
             self._already_exists(base, head)
@@ -330,8 +348,13 @@ class PullRequestEvent(object):
             git_api = ev.build_user.api()
             jobs = []
             session = {} # To store if a user is a collaborator
+            event.prefetch_build_configs(recipes)
+            # Only look up the user once for all the recipes that need it
+            pr_user = None
+            if ev.trigger_user and any(r.automatic == models.Recipe.AUTO_FOR_AUTHORIZED for r in recipes):
+                pr_user = self._get_trigger_user(pr, ev)
             for r in recipes:
-                jobs.extend(self._check_recipe(session, git_api, pr, ev, r))
+                jobs.extend(self._check_recipe(session, git_api, pr, ev, r, pr_user))
             self._update_remote(git_api, ev, jobs)
             ev.make_jobs_ready()
             ev.save()
@@ -14,7 +14,7 @@
 
 from __future__ import unicode_literals, absolute_import
 import logging
-from ci import models, views, event
+from ci import models, views, event, GitCommitData
 from django.urls import reverse
 logger = logging.getLogger('ci')
 
@@ -41,36 +41,38 @@ class PushEvent(object):
         self.changed_files = []
 
     def save(self):
-        logger.info('New push event on {}/{} for {}'.format(self.base_commit.repo, self.base_commit.ref, self.build_user))
-        default_recipes = models.Recipe.objects.filter(
-            active = True,
-            current = True,
+        logger.info('New push event on %s/%s for %s', self.base_commit.repo, self.base_commit.ref, self.build_user)
+        # Evaluate this once. It is used for the check below and for creating the jobs.
+        default_recipes = list(models.Recipe.objects.for_event(self.build_user,
             branch__repository__user__server = self.base_commit.server,
             branch__repository__user__name = self.base_commit.owner,
             branch__repository__name = self.base_commit.repo,
             branch__name = self.base_commit.ref,
-            build_user = self.build_user,
             cause = models.Recipe.CAUSE_PUSH,
-            ).order_by("-priority", "display_name")
+            ).select_related('branch'))
 
         if not default_recipes:
-            logger.info('No recipes for push on {}/{} for {}'.format(self.base_commit.repo,
+            logger.info('No recipes for push on %s/%s for %s', self.base_commit.repo,
                 self.base_commit.ref,
-                self.build_user))
+                self.build_user)
             return
 
         # create this after so we don't create unnecessary commits
-        base = self.base_commit.create()
-        head = self.head_commit.create()
+        base, head = GitCommitData.GitCommitData.create_pair(self.base_commit, self.head_commit)
 
         base.branch.repository.active = True
         base.branch.repository.save()
 
-        ev, created = models.Event.objects.get_or_create(
+        ev, created = models.Event.objects.update_or_create(
             build_user=self.build_user,
             head=head,
             base=base,
             cause=models.Event.PUSH,
+            defaults={"comments_url": self.comments_url,
+                "description": self.description,
+                "changed_files": models.Event.encode_changed_files(self.changed_files),
+                "json_data": models.Event.encode_json_data(self.full_text),
+                },
             )
         recipes = []
         if not created:
@@ -79,34 +81,34 @@ class PushEvent(object):
             for j in ev.jobs.all():
                 recipes.append(j.recipe)
         else:
-            recipes = [r for r in default_recipes.all()]
+            recipes = default_recipes
             if ev.auto_cancel_event_except_current():
                 self._auto_cancel_events(ev)
             else:
                 self._auto_cancel_jobs(ev, recipes)
+            # Canceling saves the older events, so bump this one to keep it the latest
+            ev.save(update_fields=['last_modified'])
 
-        ev.comments_url = self.comments_url
-        ev.set_json_data(self.full_text)
-        ev.description = self.description
-        ev.set_changed_files(self.changed_files)
-        ev.save()
         self._process_recipes(ev, recipes)
 
     def _process_recipes(self, ev, recipes):
+        event.prefetch_build_configs(recipes)
+        existing = set(ev.jobs.values_list('recipe_id', 'config_id'))
+        new_jobs = []
         for r in recipes:
             if not r.active:
                 continue
-            for config in r.build_configs.order_by("name").all():
-                job, created = models.Job.objects.get_or_create(recipe=r, event=ev, config=config)
-                if created:
-                    job.active = True
-                    if r.automatic == models.Recipe.MANUAL:
-                        job.active = False
-                        job.status = models.JobStatus.ACTIVATION_REQUIRED
-                    job.ready = False
-                    job.complete = False
-                    job.save()
-                    logger.info('Created job {}: {}: on {}'.format(job.pk, job, r.repository))
+            for config in r.build_configs.all():
+                if (r.pk, config.pk) in existing:
+                    continue
+                job = models.Job(recipe=r, event=ev, config=config, active=True, ready=False, complete=False)
+                if r.automatic == models.Recipe.MANUAL:
+                    job.active = False
+                    job.status = models.JobStatus.ACTIVATION_REQUIRED
+                new_jobs.append(job)
+
+        for job in event.create_jobs(ev, new_jobs):
+            logger.info('Created job %s: %s: on %s', job.pk, job, job.recipe.repository)
         ev.make_jobs_ready()
 
     def _auto_cancel_jobs(self, ev, recipes):
@@ -125,7 +127,7 @@ class PushEvent(object):
                         recipe__filename=r.filename,
                         )
                 for j in js.all():
-                    logger.info('Job {}: {} canceled by new push event {}: {}'.format(j.pk, j, ev.pk, ev))
+                    logger.info('Job %s: %s canceled by new push event %s: %s', j.pk, j, ev.pk, ev)
                     # We don't need to update remote Git server status since
                     # we will have new jobs
                     views.set_job_canceled(j, msg)
@@ -146,9 +148,8 @@ class PushEvent(object):
         # that one and this one.
         # If not, then just cancel any previous events that are not complete
         current_running = base_q.filter(status=models.JobStatus.RUNNING).order_by('-created')
-        running_event = None
-        if current_running.count() > 0:
-            running_event = current_running.last()
+        running_event = current_running.last()
+        if running_event:
             cancel_events = base_q.filter(complete=False, created__gt=running_event.created, created__lt=ev.created)
             for e in cancel_events.all():
                 event.auto_cancel_event(e, msg)
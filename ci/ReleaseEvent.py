@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from __future__ import unicode_literals, absolute_import
-from ci import models
+from ci import models, event
 import logging
 logger = logging.getLogger('ci')
 
@@ -38,55 +38,57 @@ class ReleaseEvent(object):
         self.release_tag = ''
 
     def save(self):
-        logger.info("New release event '{}' on {}/{}:{} for {}".format(
+        logger.info("New release event '%s' on %s/%s:%s for %s",
             self.release_tag,
             self.commit.owner,
             self.commit.repo,
             self.commit.ref,
-            self.build_user))
+            self.build_user)
 
-        recipes = models.Recipe.objects.filter(
-            active = True,
-            current = True,
+        recipes = models.Recipe.objects.for_event(self.build_user,
             repository__user__server = self.commit.server,
             repository__user__name = self.commit.owner,
             repository__name = self.commit.repo,
-            build_user = self.build_user,
             cause = models.Recipe.CAUSE_RELEASE,
             )
 
         if not recipes:
-            logger.info('No recipes for release {} on {}/{} for {}'.format(
-                self.release_tag, self.commit.repo, self.commit.ref, self.build_user))
+            logger.info('No recipes for release %s on %s/%s for %s',
+                self.release_tag, self.commit.repo, self.commit.ref, self.build_user)
             return
 
         # create this after so we don't create unnecessary commits
         base = self.commit.create()
 
-        ev, created = models.Event.objects.get_or_create(
+        ev, created = models.Event.objects.update_or_create(
             build_user=self.build_user,
             head=base,
             base=base,
             cause=models.Event.RELEASE,
+            defaults={"description": self.description,
+                "json_data": models.Event.encode_json_data(self.full_text),
+                },
             )
 
-        ev.set_json_data(self.full_text)
-        ev.description = self.description
-        ev.save()
         self._process_recipes(ev, recipes)
 
     def _process_recipes(self, ev, recipes):
-        for r in recipes.all():
+        # recipes was already evaluated in save() so this uses the cached results
+        recipes = list(recipes)
+        event.prefetch_build_configs(recipes)
+        existing = set(ev.jobs.values_list('recipe_id', 'config_id'))
+        new_jobs = []
+        for r in recipes:
             if not r.active:
                 continue
-            for config in r.build_configs.order_by("name").all():
-                job, created = models.Job.objects.get_or_create(recipe=r, event=ev, config=config)
-                if created:
-                    job.active = True
-                    if r.automatic == models.Recipe.MANUAL:
-                        job.active = False
-                    job.ready = False
-                    job.complete = False
-                    job.save()
-                    logger.info('Created job {}: {}: on {}'.format(job.pk, job, r.repository))
+            for config in r.build_configs.all():
+                if (r.pk, config.pk) in existing:
+                    continue
+                job = models.Job(recipe=r, event=ev, config=config, active=True, ready=False, complete=False)
+                if r.automatic == models.Recipe.MANUAL:
+                    job.active = False
+                new_jobs.append(job)
+
+        for job in event.create_jobs(ev, new_jobs):
+            logger.info('Created job %s: %s: on %s', job.pk, job, job.recipe.repository)
         ev.make_jobs_ready()
@@ -81,7 +81,7 @@ def set_passed(since, x_axis, title, context, context_key, graph_display, bins):
 
 def create_repo_pr_graph(repo, since, x_axis, title, graph_display, bins):
     q = models.PullRequest.objects.filter(repository__pk=repo["id"], created__gte=since).values("created")
-    if not q.count():
+    if not q.exists():
         return
     data = sort_stats_by_bin(q, "created", bins)
     all_data = [ [x_axis, repo["name"] ] ]
@@ -86,7 +86,8 @@ class EventAdmin(admin.ModelAdmin):
         'pull_request__number',
         'id',
         ]
-    readonly_fields = ['json_data', 'comments_url']
+    readonly_fields = ['json_data_decoded', 'comments_url']
+    exclude = ['json_data']
 
 @admin.register(models.PullRequest)
 class PullRequestAdmin(admin.ModelAdmin):
@@ -15,12 +15,13 @@
 
 from __future__ import unicode_literals, absolute_import
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from ci import models, views
 import datetime
 from ci import Permissions, TimeUtils, EventsStatus, RepositoryStatus
+from ci.JsonUtils import JsonResponse
 import logging
 logger = logging.getLogger('ci')
 
@@ -251,7 +252,7 @@ def user_open_prs(request, username):
     Get the updates for the main page.
     """
     users = models.GitUser.objects.filter(name=username)
-    if users.count() == 0:
+    if not users.exists():
         return HttpResponseBadRequest('Bad username')
 
     if 'last_request' not in request.GET:
@@ -17,7 +17,7 @@ from __future__ import unicode_literals, absolute_import
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 import logging, traceback
-from ci import models, PushEvent, PullRequestEvent, GitCommitData
+from ci import models, PushEvent, PullRequestEvent, GitCommitData, JsonUtils
 import json
 
 logger = logging.getLogger('ci')
@@ -122,7 +122,7 @@ def webhook(request, build_key):
         return HttpResponseNotAllowed(['POST'])
 
     try:
-        data = json.loads(request.body)
+        data = JsonUtils.loads(request.body)
     except ValueError:
         err_str = "Bad json in github webhook request"
         logger.warning(err_str)
@@ -133,7 +133,7 @@ def webhook(request, build_key):
         logger.warning("No user with build key %s" % build_key)
         return HttpResponseBadRequest("Error")
 
-    if user.recipes.count() == 0:
+    if not user.recipes.exists():
         logger.warning("User '%s' does not have any recipes" % user)
         return HttpResponseBadRequest("Error")
 
@@ -142,7 +142,8 @@ def webhook(request, build_key):
 def process_event(user, json_data):
     ret = HttpResponse('OK')
     try:
-        logger.info('Webhook called:\n{}'.format(json.dumps(json_data, indent=2)))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Webhook called:\n%s', json.dumps(json_data, indent=2))
         if 'pullrequest' in json_data:
             process_pull_request(user, json_data)
         elif 'push' in json_data:
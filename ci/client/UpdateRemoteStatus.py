@@ -237,7 +237,7 @@ def start_canceled_on_fail(job):
 
     logger.info("%s push got failed job: %s" % (job.event, job))
 
-    failed = job.event.jobs.filter(status=models.JobStatus.FAILED).exclude(pk=job.pk).count()
+    failed = job.event.jobs.filter(status=models.JobStatus.FAILED).exclude(pk=job.pk).exists()
 
     if failed:
         # If there are other jobs on this event that have failed, they would
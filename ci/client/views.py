@@ -16,8 +16,7 @@
 from __future__ import unicode_literals, absolute_import
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse, HttpResponseNotAllowed, HttpResponseBadRequest
-import json
-from ci import models, views, Permissions
+from ci import models, views, Permissions, JsonUtils
 from ci.recipe import file_utils
 import logging
 from django.conf import settings
@@ -111,7 +110,7 @@ def check_post(request, required_keys):
     if request.method != 'POST':
         return None, HttpResponseNotAllowed(['POST'])
     try:
-        data = json.loads(request.body)
+        data = JsonUtils.loads(request.body)
         required = set(required_keys)
         available = set(data.keys())
         if not required.issubset(available):
@@ -268,6 +267,7 @@ def claim_job_check(request, build_key, config_name, client_name):
         logger.info('{} trying to get job {}'.format(client_name, data['job_id']))
         job = (models.Job.objects
                 .select_related('client',
+                    'event__build_user__server',
                     'event__head__branch__repository__user',
                     'event__base__branch__repository__user__server')
                 .get(pk=int(data['job_id']),
@@ -328,7 +328,14 @@ def check_job_finished_post(request, build_key, client_name, job_id):
         return HttpResponseBadRequest('Invalid client'), None, None, None
 
     try:
-        job = models.Job.objects.get(pk=job_id, client=client, event__build_user__build_key=build_key)
+        job = (models.Job.objects
+                .select_related('recipe',
+                    'config',
+                    'event__build_user__server',
+                    'event__head__branch__repository__user__server',
+                    'event__base__branch__repository__user__server',
+                    'event__pull_request')
+                .get(pk=job_id, client=client, event__build_user__build_key=build_key))
     except models.Job.DoesNotExist:
         return HttpResponseBadRequest('Invalid job/build_key'), None, None, None
 
@@ -389,7 +396,9 @@ def check_step_result_post(request, build_key, client_name, stepresult_id):
         step_result = (models.StepResult.objects
                 .select_related('job',
                     'job__event',
-                    'job__event__base__branch__repository',
+                    'job__event__build_user__server',
+                    'job__event__head__branch__repository__user__server',
+                    'job__event__base__branch__repository__user__server',
                     'job__client',
                     'job__event__pull_request')
                 .get(pk=stepresult_id))
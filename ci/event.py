@@ -15,6 +15,9 @@
 
 from __future__ import unicode_literals, absolute_import
 from ci import models
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 import logging
 import re
 from ci.client import UpdateRemoteStatus
@@ -28,29 +31,74 @@ def cancel_event(ev, message, update_remote=False, do_pr_status_update=True):
       message[str]: Message to put in the changelog
       request[django.http.HttpRequest]: If set, then try to update the remote status
     """
-    logger.info('Canceling event {}: {}'.format(ev.pk, ev))
-    cancelled_jobs = []
-    for job in ev.jobs.all():
-        if not job.complete:
+    cancelled_jobs = list(ev.jobs.filter(complete=False).select_related('recipe', 'config', 'client'))
+    if cancelled_jobs:
+        # update() doesn't touch auto_now fields so set last_modified explicitly.
+        num = models.Job.objects.filter(pk__in=[j.pk for j in cancelled_jobs]).update(
+                status=models.JobStatus.CANCELED,
+                complete=True,
+                last_modified=timezone.now())
+        models.JobChangeLog.objects.bulk_create(
+                [models.JobChangeLog(job=job, message=message) for job in cancelled_jobs])
+        for job in cancelled_jobs:
             job.status = models.JobStatus.CANCELED
             job.complete = True
-            job.save()
-            logger.info('Canceling event {}: {} : job {}: {}'.format(ev.pk,
-                ev, job.pk, job.str_with_client()))
-            models.JobChangeLog.objects.create(job=job, message=message)
-            cancelled_jobs.append(job)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Canceling event %s: %s : %s jobs: %s', ev.pk, ev, num,
+                ', '.join('{}: {}'.format(job.pk, job.str_with_client()) for job in cancelled_jobs))
+    else:
+        logger.info('Canceling event %s: %s : no incomplete jobs', ev.pk, ev)
 
     if ev.complete and ev.status == models.JobStatus.CANCELED and not cancelled_jobs:
         return
     ev.complete = True
-    ev.save()
-    ev.set_status(models.JobStatus.CANCELED)
+    ev.set_status(models.JobStatus.CANCELED) # This will save the event
 
     if update_remote:
         for job in cancelled_jobs:
             UpdateRemoteStatus.job_complete_pr_status(job, do_pr_status_update)
         UpdateRemoteStatus.event_complete(ev)
 
+def create_jobs(ev, jobs):
+    """
+    Creates new jobs on an event with a single INSERT.
+    Jobs that already exist in the DB are ignored, including ones
+    that another request created since the caller checked.
+    The event row is locked while this runs so that concurrent calls
+    on the same event don't both report a job as created.
+    Input:
+      ev[models.Event]: Event that the jobs are on
+      jobs[list[models.Job]]: Unsaved jobs to create
+    Return:
+      list[models.Job]: The jobs created by this call, in the same order as jobs
+    """
+    if not jobs:
+        return []
+    recipe_ids = set(j.recipe_id for j in jobs)
+    q = models.Job.objects.filter(event=ev, recipe__in=recipe_ids)
+    saved = {}
+    with transaction.atomic():
+        # Nobody else can add jobs to this event until we are done
+        list(models.Event.objects.select_for_update().filter(pk=ev.pk).values_list('pk'))
+        # Rows that are already there, so that we don't report them as created
+        before = set(q.values_list('pk', flat=True))
+        models.Job.objects.bulk_create(jobs, ignore_conflicts=True)
+        # bulk_create doesn't set the primary keys on all databases so read them back
+        for j in q.exclude(pk__in=before).select_related('recipe__repository', 'config'):
+            saved[(j.recipe_id, j.config_id)] = j
+    keys = [(j.recipe_id, j.config_id) for j in jobs]
+    return [saved[k] for k in keys if k in saved]
+
+def prefetch_build_configs(recipes):
+    """
+    Loads the build configs of all the recipes with a single query.
+    Afterwards recipe.build_configs.all() is sorted by name and doesn't hit the DB.
+    Input:
+      recipes[list[models.Recipe]]: Recipes to load the build configs for
+    """
+    configs = Prefetch('build_configs', queryset=models.BuildConfig.objects.order_by('name'))
+    prefetch_related_objects(recipes, configs)
+
 def get_active_labels(repo, changed_files):
     patterns = repo.get_repo_setting("recipe_label_activation", {})
     add_patterns = repo.get_repo_setting("recipe_label_activation_additive", {})
@@ -90,14 +138,14 @@ def auto_cancel_event(ev, message):
     Input:
       ev: models.Event
     """
-    logger.info('Auto canceling event {}: {}'.format(ev.pk, ev))
+    logger.info('Auto canceling event %s: %s', ev.pk, ev)
     for job in ev.jobs.all():
         if not job.complete and job.recipe.auto_cancel_on_push:
             job.status = models.JobStatus.CANCELED
             job.complete = True
             job.save()
-            logger.info('Auto canceling event {}: {} : job {}: {}'.format(ev.pk,
-                ev, job.pk, job.str_with_client()))
+            logger.info('Auto canceling event %s: %s : job %s: %s', ev.pk,
+                ev, job.pk, job.str_with_client())
             models.JobChangeLog.objects.create(job=job, message=message)
 
     ev.save() # update the timestamp so the js updater works
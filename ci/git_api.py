@@ -151,22 +151,27 @@ class GitAPI(object):
             self._bad_response = True
         return response
 
-    def get(self, url, params=None, timeout=None, log=True):
+    def get(self, url, params=None, timeout=None, log=True, headers=None):
         """
         Get the URL.
         Input:
             url[str]: URL to get
             params[dict]: Dictionary of extra parameters to send in the request
             timeout[int]: Specify a timeout other than the default.
+            headers[dict]: Extra headers to send in the request
         Return:
             requests.Reponse or None if there was a requests exception
         """
         self._bad_response = False
+        all_headers = self._headers
+        if headers:
+            all_headers = dict(self._headers)
+            all_headers.update(headers)
         try:
             timeout = self._timeout(timeout)
             params = self._params(params, True)
             response = self._session.get(url,
-                    params=params, timeout=timeout, headers=self._headers, verify=self._ssl_cert)
+                    params=params, timeout=timeout, headers=all_headers, verify=self._ssl_cert)
         except Exception as e:
             return self._response_exception(url, "GET", e, params=params)
 
@@ -267,6 +272,29 @@ class GitAPI(object):
 
         return self._check_response(response, self._default_params, log=log)
 
+    def _get_first_page(self, url, params, timeout, log):
+        if params is None:
+            params = {}
+        params[self._per_page_key] = self._per_page
+        response = self.get(url, params=params, timeout=timeout, log=log)
+        if response is None or self._bad_response:
+            return None, params
+        return response, params
+
+    def _get_next_page(self, response, params, timeout, log):
+        """
+        Get the page after response.
+        Return:
+            requests.Response or None if there are no more pages or there was a problem
+        """
+        if 'next' not in response.links:
+            return None
+        response = self.get(response.links["next"]["url"],
+                params=params, timeout=timeout, log=log)
+        if self._bad_response or not response:
+            return None
+        return response
+
     def get_all_pages(self, url, params=None, timeout=None, log=True):
         """
         Get all the pages for a URL by following the "next" links on a response.
@@ -277,27 +305,49 @@ class GitAPI(object):
         Return:
             list: List ofor None if there was any problems
         """
-        if params is None:
-            params = {}
-        params[self._per_page_key] = self._per_page
-        response = self.get(url, params=params, timeout=timeout, log=log)
-        if response is None or self._bad_response:
+        response, params = self._get_first_page(url, params, timeout, log)
+        if response is None:
             return None
 
         all_json = response.json()
         try:
-            while 'next' in response.links:
-                response = self.get(response.links["next"]["url"],
-                        params=params, timeout=timeout, log=log)
-                if not self._bad_response and response:
-                    all_json.extend(response.json())
-                else:
-                    break
+            response = self._get_next_page(response, params, timeout, log)
+            while response is not None:
+                all_json.extend(response.json())
+                response = self._get_next_page(response, params, timeout, log)
         except Exception as e:
             self._add_error("Error getting multiple pages at %s\nSent data:\n%s\nError: %s" % (
                 url, self._format_json(params), e), log)
         return all_json
 
+    def iter_all_pages(self, url, params=None, timeout=None, log=True):
+        """
+        Like get_all_pages() but the items are generated as they are needed.
+        The next page is only requested once the items on the current page are used up,
+        so callers that stop early don't fetch the remaining pages.
+        Only for URLs that return a list on each page.
+        Input:
+            url[str]: URL to get
+            params[dict]: Dictionary of extra parameters to send in the request
+            timeout[int]: Specify a timeout other than the default.
+        Return:
+            generator: Items of all the pages or None if there was a problem getting the first page
+        """
+        response, params = self._get_first_page(url, params, timeout, log)
+        if response is None:
+            return None
+        return self._iter_pages(response, url, params, timeout, log)
+
+    def _iter_pages(self, response, url, params, timeout, log):
+        try:
+            while response is not None:
+                for item in response.json():
+                    yield item
+                response = self._get_next_page(response, params, timeout, log)
+        except Exception as e:
+            self._add_error("Error getting multiple pages at %s\nSent data:\n%s\nError: %s" % (
+                url, self._format_json(params), e), log)
+
     @abc.abstractmethod
     def sign_in_url(self):
         """
@@ -15,7 +15,9 @@
 
 from __future__ import unicode_literals, absolute_import
 from django.urls import reverse
+from django.core.cache import cache
 import logging
+import hashlib
 from ci.git_api import GitAPI, GitException, copydoc
 import requests
 import re
@@ -34,6 +36,7 @@ class GitHubAPI(GitAPI):
         (GitAPI.RUNNING, "pending"),
         (GitAPI.CANCELED, "error"),
         )
+    _STATUS_MAP = dict(STATUS)
 
     def __init__(self, config, access_user=None, token=None):
         super(GitHubAPI, self).__init__(config, access_user=access_user,  token=token)
@@ -43,6 +46,7 @@ class GitHubAPI(GitAPI):
         self._prefix = "%s_" % self._hostname
         self._repos_key = "%s_repos" % self._prefix
         self._org_repos_key = "%s_org_repos" % self._prefix
+        self._etag_cache_timeout = config.get("etag_cache_timeout", 60*60*24)
         self._headers["Accept"] = "application/vnd.github.v3+json"
 
         if self._access_user is not None:
@@ -81,10 +85,63 @@ class GitHubAPI(GitAPI):
         """
         Used to convert a GitAPI status into a string that GitHub wants.
         """
-        for status_pair in self.STATUS:
-            if status == status_pair[0]:
-                return status_pair[1]
-        return None
+        return self._STATUS_MAP.get(status)
+
+    def _etag_cache_key(self, url, params):
+        """
+        Key in the Django cache for a conditional GET.
+        The responses depend on who is asking so the user is part of the key.
+        """
+        if self._access_user is not None:
+            who = "user%s" % self._access_user.pk
+        elif self._token is not None:
+            who = "token%s" % self._token
+        else:
+            who = ""
+        key = "%s|%s|%s|%s" % (who, url, sorted(params.items()), self._hostname)
+        return "github_etag_%s" % hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _get_all_pages_cached(self, url, params=None):
+        """
+        Like get_all_pages() but does conditional requests with the ETag of the last response.
+        On a match GitHub replies with a 304 and an empty body, which doesn't count
+        against the rate limit, and the cached data is used instead.
+        Input:
+            url[str]: URL to get
+            params[dict]: Dictionary of extra parameters to send in the request
+        Return:
+            list: List of items or None if there was any problems getting the first page
+        """
+        if params is None:
+            params = {}
+        params[self._per_page_key] = self._per_page
+        all_json = []
+        next_url = url
+        while next_url:
+            key = self._etag_cache_key(next_url, params)
+            cached = cache.get(key)
+            headers = None
+            if cached:
+                headers = {"If-None-Match": cached[0]}
+            response = self.get(next_url, params=params, headers=headers)
+            if response is None or self._bad_response:
+                if next_url == url:
+                    return None
+                break
+
+            if cached and response.status_code == 304:
+                etag, data, next_url = cached
+            else:
+                data = response.json()
+                next_url = None
+                if 'next' in response.links:
+                    next_url = response.links["next"]["url"]
+                etag = response.headers.get("ETag")
+                if etag:
+                    cache.set(key, (etag, data, next_url), self._etag_cache_timeout)
+            if data:
+                all_json.extend(data)
+        return all_json
 
     @copydoc(GitAPI.get_all_repos)
     def get_all_repos(self, username):
@@ -99,7 +156,7 @@ class GitHubAPI(GitAPI):
         """
         url = "%s/user/repos" % self._api_url
         data = {"affiliation": ["owner", "collaborator"]}
-        repo_data = self.get_all_pages(url, data)
+        repo_data = self._get_all_pages_cached(url, data)
         owner_repo = []
         if repo_data:
             for repo in repo_data:
@@ -118,7 +175,7 @@ class GitHubAPI(GitAPI):
     @copydoc(GitAPI.get_branches)
     def get_branches(self, owner, repo):
         url = "%s/repos/%s/%s/branches" % (self._api_url, owner, repo)
-        data = self.get_all_pages(url)
+        data = self._get_all_pages_cached(url)
         branches = []
         if data:
             for branch in data:
@@ -132,7 +189,7 @@ class GitHubAPI(GitAPI):
         """
         url = "%s/user/repos" % self._api_url
         data = {"affiliation": "organization_member"}
-        repo_data = self.get_all_pages(url, data)
+        repo_data = self._get_all_pages_cached(url, data)
         org_repo = []
         if repo_data:
             for repo in repo_data:
@@ -166,7 +223,8 @@ class GitHubAPI(GitAPI):
 
         self.post(url, data=data, timeout=timeout)
         if not self._bad_response:
-            logger.info("Set pr status %s:\nSent Data:\n%s" % (url, self._format_json(data)))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Set pr status %s:\nSent Data:\n%s", url, self._format_json(data))
 
     def _remove_pr_todo_labels(self, owner, repo, pr_num):
         """
@@ -195,7 +253,7 @@ class GitHubAPI(GitAPI):
                     new_url = "%s/%s" % (url, label["name"])
                     response = self.delete(new_url)
                     if response is not None:
-                        logger.info("%s/%s #%s: Removed label '%s'" % (owner, repo, pr_num, label["name"]))
+                        logger.info("%s/%s #%s: Removed label '%s'", owner, repo, pr_num, label["name"])
                     break
 
     @copydoc(GitAPI.remove_pr_label)
@@ -211,19 +269,19 @@ class GitHubAPI(GitAPI):
 
         prefix = "%s/%s #%s:" % (owner, repo, pr_num)
         if not label_name:
-            logger.info("%s Not removing empty label" % prefix)
+            logger.info("%s Not removing empty label", prefix)
             return
 
         url = "%s/repos/%s/%s/issues/%s/labels/%s" % (self._api_url, owner, repo, pr_num, label_name)
         response = self.delete(url, log=False)
         if not response or response.status_code == 404:
             # if we get this then the label probably isn't on the PR
-            logger.info("%s Label '%s' was not found" % (prefix, label_name))
+            logger.info("%s Label '%s' was not found", prefix, label_name)
             return
 
         try:
             response.raise_for_status()
-            logger.info("%s Removed label '%s'" % (prefix, label_name))
+            logger.info("%s Removed label '%s'", prefix, label_name)
         except Exception as e:
             msg = "%s Problem occured while removing label '%s'\nURL: %s\nError: %s" \
                 % (prefix, label_name, url, e)
@@ -242,13 +300,13 @@ class GitHubAPI(GitAPI):
 
         prefix = "%s/%s #%s:" % (owner, repo, pr_num)
         if not label_name:
-            logger.info("%s Not adding empty label" % prefix)
+            logger.info("%s Not adding empty label", prefix)
             return
 
         url = "%s/repos/%s/%s/issues/%s/labels" % (self._api_url, owner, repo, pr_num)
         response = self.post(url, data=[label_name])
         if not self._bad_response and response is not None:
-            logger.info("%s Added label '%s'" % (prefix, label_name))
+            logger.info("%s Added label '%s'", prefix, label_name)
 
     @copydoc(GitAPI.is_collaborator)
     def is_collaborator(self, user, repo):
@@ -271,13 +329,13 @@ class GitHubAPI(GitAPI):
         prefix = "%s/%s:" % (owner, repo)
         # on success a 204 no content
         if response.status_code == 403:
-            logger.info('%s User "%s" does not have permission to check collaborators' % (prefix, user))
+            logger.info('%s User "%s" does not have permission to check collaborators', prefix, user)
             return False
         elif response.status_code == 404:
-            logger.info('%s User "%s" is NOT a collaborator' % (prefix, user))
+            logger.info('%s User "%s" is NOT a collaborator', prefix, user)
             return False
         elif response.status_code == 204:
-            logger.info('%s User "%s" is a collaborator' % (prefix, user))
+            logger.info('%s User "%s" is a collaborator', prefix, user)
             return True
         else:
             self._add_error('%s Unknown response on collaborator check for user "%s"\n%s' %
@@ -345,9 +403,10 @@ class GitHubAPI(GitAPI):
 
         hook_url = '%s/repos/%s/%s/hooks' % (self._api_url, owner, repo)
         callback_url = urljoin(self._civet_url, reverse('ci:github:webhook', args=[user_build_key]))
-        data = self.get_all_pages(hook_url)
+        # Stops fetching pages once the hook is found
+        data = self.iter_all_pages(hook_url)
+        err = 'Failed to access webhook to %s/%s for user %s' % (owner, repo, user)
         if self._bad_response or data is None:
-            err = 'Failed to access webhook to %s/%s for user %s' % (owner, repo, user)
             self._add_error(err)
             raise GitException(err)
 
@@ -364,6 +423,11 @@ class GitHubAPI(GitAPI):
         if have_hook:
             return
 
+        if self._bad_response:
+            # Failed getting one of the later pages
+            self._add_error(err)
+            raise GitException(err)
+
         add_hook = {
             'name': 'web', # "web" is required for webhook
             'active': True,
@@ -379,7 +443,7 @@ class GitHubAPI(GitAPI):
         if self._bad_response or "errors" in data:
             raise GitException(data['errors'])
 
-        logger.info('%s/%s: Added webhook for user %s' % (owner, repo, user))
+        logger.info('%s/%s: Added webhook for user %s', owner, repo, user)
 
     def _get_pr_changed_files(self, owner, repo, pr_num):
         """
@@ -424,7 +488,7 @@ class GitHubAPI(GitAPI):
         del_url = comment.get("url")
         response = self.delete(del_url)
         if not self._bad_response and response:
-            logger.info("Removed comment: %s" % del_url)
+            logger.info("Removed comment: %s", del_url)
 
     @copydoc(GitAPI.edit_pr_comment)
     def edit_pr_comment(self, comment, msg):
@@ -434,7 +498,7 @@ class GitHubAPI(GitAPI):
         edit_url = comment.get("url")
         response = self.patch(edit_url, data={"body": msg})
         if not self._bad_response and response:
-            logger.info("Edited PR comment: %s" % edit_url)
+            logger.info("Edited PR comment: %s", edit_url)
 
     def _is_org_member(self, org):
         """
@@ -494,9 +558,9 @@ class GitHubAPI(GitAPI):
             api = GitHubAPI(self._config, access_user=user)
             ret = api._is_org_member(team)
             if ret:
-                logger.info('"%s" IS a member of organization "%s"' % (user, team))
+                logger.info('"%s" IS a member of organization "%s"', user, team)
             else:
-                logger.info('"%s" is NOT a member of organization "%s"' % (user, team))
+                logger.info('"%s" is NOT a member of organization "%s"', user, team)
             return ret
         elif len(paths) == 2:
             # Must be a team in the form <org>/<team name>
@@ -504,9 +568,9 @@ class GitHubAPI(GitAPI):
             if team_id is not None:
                 ret = self._is_team_member(team_id, user.name)
                 if ret:
-                    logger.info('"%s" IS a member of team "%s"' % (user, team))
+                    logger.info('"%s" IS a member of team "%s"', user, team)
                 else:
-                    logger.info('"%s" is NOT a member of team "%s"' % (user, team))
+                    logger.info('"%s" is NOT a member of team "%s"', user, team)
                 return ret
         self._add_error("Failed to check if '%s' is a member of '%s': Bad team name" % (user, team))
         return False
@@ -545,7 +609,7 @@ class GitHubAPI(GitAPI):
         post_data = {"title": title, "body": body}
         data = self.post(url, data=post_data)
         if not self._bad_response and data:
-            logger.info("Created issue \"%s\": %s" % (title, data.json().get("html_url")))
+            logger.info("Created issue \"%s\": %s", title, data.json().get("html_url"))
 
     def _edit_issue(self, owner, repo, issue_id, title, body):
         """
@@ -555,7 +619,7 @@ class GitHubAPI(GitAPI):
         post_data = {"title": title, "body": body}
         data = self.patch(url, data=post_data)
         if not self._bad_response and data:
-            logger.info("Updated issue \"%s\": %s" % (title, data.json().get("html_url")))
+            logger.info("Updated issue \"%s\": %s", title, data.json().get("html_url"))
 
     @copydoc(GitAPI.create_or_update_issue)
     def create_or_update_issue(self, owner, repo, title, body, new_comment):
@@ -580,7 +644,7 @@ class GitHubAPI(GitAPI):
         auto_merge_label = repo.auto_merge_label()
         auto_merge_require_review = repo.auto_merge_require_review()
         if not auto_merge_label:
-            logger.info("%s:%s: No auto merging configured" % (self._hostname, repo))
+            logger.info("%s:%s: No auto merging configured", self._hostname, repo)
             return False
 
         repo_name = repo.name
@@ -590,12 +654,12 @@ class GitHubAPI(GitAPI):
         prefix = "%s:%s/%s #%s:" % (self._hostname, owner, repo_name, pr_num)
         pr_info = self.get_all_pages(url)
         if pr_info is None or self._bad_response:
-            logger.info("%s Failed to get info" % prefix)
+            logger.info("%s Failed to get info", prefix)
             return False
 
         all_labels = [label["name"] for label in pr_info["labels"]]
         if auto_merge_label not in all_labels:
-            logger.info("%s Auto merge label not on PR" % prefix)
+            logger.info("%s Auto merge label not on PR", prefix)
             return False
         pr_head = pr_info["head"]["sha"]
 
@@ -603,7 +667,7 @@ class GitHubAPI(GitAPI):
             url = "%s/repos/%s/%s/pulls/%s/reviews" % (self._api_url, owner, repo_name, pr_num)
             reviews = self.get_all_pages(url)
             if not reviews or self._bad_response:
-                logger.info("%s No reviews, not auto merging" % prefix)
+                logger.info("%s No reviews, not auto merging", prefix)
                 return False
             is_approved = False
             changes_requested = False
@@ -615,18 +679,18 @@ class GitHubAPI(GitAPI):
                         is_approved = True
 
             if not is_approved:
-                logger.info("%s Not approved, not auto merging" % prefix)
+                logger.info("%s Not approved, not auto merging", prefix)
                 return False
             if changes_requested:
-                logger.info("%s Changes requested, not auto merging" % prefix)
+                logger.info("%s Changes requested, not auto merging", prefix)
                 return False
 
         url = "%s/repos/%s/%s/pulls/%s/merge" % (self._api_url, owner, repo_name, pr_num)
         data = {"sha": pr_head}
         self.put(url, data=data)
         if self._bad_response:
-            logger.info("%s Failed to auto merge" % prefix)
+            logger.info("%s Failed to auto merge", prefix)
             return False
         else:
-            logger.info("%s Auto merged" % prefix)
+            logger.info("%s Auto merged", prefix)
             return True
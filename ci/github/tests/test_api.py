@@ -16,6 +16,7 @@
 from __future__ import unicode_literals, absolute_import
 from django.urls import reverse
 from django.test import override_settings
+from django.core.cache import cache
 import requests
 from ci.tests import utils
 from ci.git_api import GitException
@@ -108,6 +109,28 @@ class Tests(DBTester.DBTester):
         self.assertEqual(mock_get.call_count, 2)
         self.assertEqual(len(branches), 2)
 
+    @patch.object(requests, 'get')
+    def test_get_branches_etag(self, mock_get):
+        cache.clear()
+        response = utils.Response([{'name': 'branch1'}])
+        response.headers = {"ETag": '"1234"'}
+        mock_get.return_value = response
+        api = self.server.api()
+        self.assertEqual(api.get_branches(self.owner, self.repo), ['branch1'])
+        self.assertNotIn("If-None-Match", mock_get.call_args[1]["headers"])
+
+        # Not modified so the cached data is used
+        mock_get.return_value = utils.Response(status_code=304)
+        self.assertEqual(api.get_branches(self.owner, self.repo), ['branch1'])
+        self.assertEqual(mock_get.call_args[1]["headers"]["If-None-Match"], '"1234"')
+
+        # Modified so the new data is used
+        response = utils.Response([{'name': 'branch2'}])
+        response.headers = {"ETag": '"5678"'}
+        mock_get.return_value = response
+        self.assertEqual(api.get_branches(self.owner, self.repo), ['branch2'])
+        self.assertEqual(mock_get.call_count, 3)
+
     @patch.object(requests, 'post')
     @patch.object(requests, 'get')
     def test_update_pr_status(self, mock_get, mock_post):
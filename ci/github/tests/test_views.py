@@ -66,6 +66,18 @@ class Tests(DBTester.DBTester):
         response = self.client_post_json(url, data)
         self.assertEqual(response.status_code, 400)
 
+        # Events we don't handle are acknowledged without looking at the payload
+        self.set_counts()
+        response = self.client.post(url, "not json", content_type='application/json', HTTP_X_GITHUB_EVENT='issues')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, "not json", content_type='application/json', HTTP_X_GITHUB_EVENT='ping')
+        self.assertEqual(response.status_code, 200)
+        self.compare_counts()
+
+        # Supported events still need valid json
+        response = self.client.post(url, "not json", content_type='application/json', HTTP_X_GITHUB_EVENT='push')
+        self.assertEqual(response.status_code, 400)
+
     @patch.object(OAuth2Session, 'post')
     @patch.object(OAuth2Session, 'get')
     @patch.object(OAuth2Session, 'delete')
@@ -18,11 +18,20 @@ from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 import logging, traceback
 from ci.github.api import GitException
-from ci import models, PushEvent, PullRequestEvent, GitCommitData, ReleaseEvent
+from ci import models, PushEvent, PullRequestEvent, GitCommitData, JsonUtils, ReleaseEvent
 import json
 
 logger = logging.getLogger('ci')
 
+# Values of the X-GitHub-Event header that we process.
+# Anything else is acknowledged without parsing the payload.
+SUPPORTED_EVENTS = frozenset(['pull_request', 'push', 'release'])
+
+# Pull request actions that don't need a new event.
+# "edited" is only ignored if the PR is closed.
+IGNORED_PR_ACTIONS = frozenset(['labeled', 'unlabeled', 'assigned', 'unassigned',
+    'review_requested', 'review_request_removed', 'edited'])
+
 def process_push(user, data):
     push_event = PushEvent.PushEvent()
     push_event.build_user = user
@@ -60,24 +69,22 @@ def process_push(user, data):
     push_event.save()
 
 def process_pull_request(user, data):
-    pr_event = PullRequestEvent.PullRequestEvent()
     pr_data = data['pull_request']
-
     action = data['action']
+    state = pr_data['state']
+    if action in IGNORED_PR_ACTIONS and not (action == "edited" and state == "open"):
+        logger.info('Ignoring github action "%s" on PR: #%s: %s', action, data['number'], pr_data['title'])
+        return None
 
+    pr_event = PullRequestEvent.PullRequestEvent()
     pr_event.pr_number = int(data['number'])
 
-    state = pr_data['state']
-    if action == 'opened' or action == 'synchronize' or (action == "edited" and state == "open"):
+    if action == 'opened' or action == 'synchronize' or action == "edited":
         pr_event.action = PullRequestEvent.PullRequestEvent.OPENED
     elif action == 'closed':
         pr_event.action = PullRequestEvent.PullRequestEvent.CLOSED
     elif action == 'reopened':
         pr_event.action = PullRequestEvent.PullRequestEvent.REOPENED
-    elif action in ['labeled', 'unlabeled', 'assigned', 'unassigned', 'review_requested', 'review_request_removed', 'edited']:
-        # actions that we don't support. "edited" is not supported if the PR is closed.
-        logger.info('Ignoring github action "{}" on PR: #{}: {}'.format(action, data['number'], pr_data['title']))
-        return None
     else:
         raise GitException("Pull request %s contained unknown action: %s" % (pr_event.pr_number, action))
 
@@ -92,7 +99,7 @@ def process_pull_request(user, data):
     for prefix in server_config.get("pr_wip_prefix", []):
         if pr_event.title.startswith(prefix):
             # We don't want to test when the PR is marked as a work in progress
-            logger.info('Ignoring work in progress PR: {}'.format(pr_event.title))
+            logger.info('Ignoring work in progress PR: %s', pr_event.title)
             return None
 
     pr_event.html_url = pr_data['html_url']
@@ -157,7 +164,7 @@ def process_release(user, data):
         if tag_sha is None:
             raise GitException("Couldn't find SHA for %s/%s:%s." % (owner, repo_name, rel_event.release_tag))
 
-    logger.info("Release '%s' on %s/%s:%s using commit %s" % (rel_event.release_tag, owner, repo_name, branch, tag_sha))
+    logger.info("Release '%s' on %s/%s:%s using commit %s", rel_event.release_tag, owner, repo_name, branch, tag_sha)
 
     rel_event.commit = GitCommitData.GitCommitData(
         owner,
@@ -175,28 +182,39 @@ def webhook(request, build_key):
     if request.method != 'POST':
         return HttpResponseNotAllowed(['POST'])
 
-    try:
-        data = json.loads(request.body)
-    except ValueError:
-        err_str = "Bad json in github webhook request"
-        logger.warning(err_str)
-        return HttpResponseBadRequest(err_str)
-
     user = models.GitUser.objects.filter(build_key=build_key).first()
     if not user:
         logger.warning("No user with build key %s" % build_key)
         return HttpResponseBadRequest("Error")
 
-    if user.recipes.count() == 0:
+    if not user.recipes.exists():
         logger.warning("User '%s' does not have any recipes" % user)
         return HttpResponseBadRequest("Error")
 
+    # GitHub tells us the event type in a header so we can skip
+    # parsing the payload of events that we don't handle.
+    event_type = request.META.get('HTTP_X_GITHUB_EVENT')
+    if event_type == 'ping':
+        logger.info('Got ping for user %s', user.name)
+        return HttpResponse('OK')
+    if event_type and event_type not in SUPPORTED_EVENTS:
+        logger.info('Ignoring github event "%s" for user %s', event_type, user.name)
+        return HttpResponse('OK')
+
+    try:
+        data = JsonUtils.loads(request.body)
+    except ValueError:
+        err_str = "Bad json in github webhook request"
+        logger.warning(err_str)
+        return HttpResponseBadRequest(err_str)
+
     return process_event(user, data)
 
 def process_event(user, json_data):
     ret = HttpResponse('OK')
     try:
-        logger.info('Webhook called:\n{}'.format(json.dumps(json_data, indent=2)))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Webhook called:\n%s', json.dumps(json_data, indent=2))
 
         if 'pull_request' in json_data:
             process_pull_request(user, json_data)
@@ -207,7 +225,7 @@ def process_event(user, json_data):
         elif 'zen' in json_data:
             # this is a ping that gets called when first
             # installing a hook. Just log it and move on.
-            logger.info('Got ping for user {}'.format(user.name))
+            logger.info('Got ping for user %s', user.name)
         else:
             err_str = 'Unknown post to github hook'
             logger.warning(err_str)
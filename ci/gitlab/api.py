@@ -18,8 +18,8 @@ from django.urls import reverse
 import logging
 import requests
 from ci.git_api import GitAPI, GitException, copydoc
+from ci import JsonUtils
 import re
-import json
 try:
     from urllib.parse import quote_plus, urljoin
 except ImportError:
@@ -36,6 +36,7 @@ class GitLabAPI(GitAPI):
         (GitAPI.RUNNING, "running"),
         (GitAPI.CANCELED, "canceled"),
         )
+    _STATUS_MAP = dict(STATUS)
 
     def __init__(self, config, access_user=None, token=None):
         super(GitLabAPI, self).__init__(config, access_user=access_user,  token=token)
@@ -49,7 +50,7 @@ class GitLabAPI(GitAPI):
         self._user_key= "%s_user" % self._prefix
 
         if access_user is not None and access_user.token:
-            token = json.loads(access_user.token)
+            token = JsonUtils.loads(access_user.token)
             # For backwards compatability, users that haven't signed in
             # with the new OAuth2 application, their current token
             # is a private token which requires a different http header to be set.
@@ -184,10 +185,7 @@ class GitLabAPI(GitAPI):
         """
         Used to convert a GitAPI status into a string that GitLab wants.
         """
-        for status_pair in self.STATUS:
-            if status == status_pair[0]:
-                return status_pair[1]
-        return None
+        return self._STATUS_MAP.get(status)
 
     @copydoc(GitAPI.update_pr_status)
     def update_pr_status(self, base, head, state, event_url, description, context, job_stage):
@@ -221,7 +219,8 @@ class GitLabAPI(GitAPI):
             logger.warning("Error setting pr status %s\nSent data:\n%s\nReply:\n%s" % \
                     (url, self._format_json(data), self._format_json(response.json())))
         elif not self._bad_response:
-            logger.info("Set pr status %s:\nSent Data:\n%s" % (url, self._format_json(data)))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Set pr status %s:\nSent Data:\n%s", url, self._format_json(data))
 
     def _is_group_member(self, group_id, username):
         """
@@ -289,10 +288,12 @@ class GitLabAPI(GitAPI):
         path_with_namespace = '%s/%s' % (repo.user.name, repo.name)
         hook_url = '%s/hooks' % self._repo_url(path_with_namespace)
         callback_url = urljoin(self._civet_url, reverse('ci:gitlab:webhook', args=[user.build_key]))
-        data = self.get_all_pages(hook_url)
+        # Stops fetching pages once the hook is found
+        num_errors = len(self._errors)
+        data = self.iter_all_pages(hook_url)
 
         have_hook = False
-        if not self._bad_response and data:
+        if data is not None:
             for hook in data:
                 if hook.get('merge_requests_events') and hook.get('push_events') and hook.get('url') == callback_url:
                     have_hook = True
@@ -301,6 +302,12 @@ class GitLabAPI(GitAPI):
         if have_hook:
             return
 
+        if self._bad_response or len(self._errors) > num_errors:
+            # Failed getting one of the pages so we don't know if the hook is there
+            err = 'Failed to access webhook to %s for user %s' % (repo, user.name)
+            self._add_error(err)
+            raise GitException(err)
+
         add_hook = {
             'id': self._gitlab_id(repo.user.name, repo.name),
             'url': callback_url,
@@ -189,6 +189,13 @@ class Tests(DBTester.DBTester):
             'push_events': 'true', 'url': callback_url })
         api.install_webhooks(self.build_user, self.repo)
 
+        # can't get the hooks so it shouldn't try to add one
+        mock_get.return_value = utils.Response(status_code=404)
+        mock_post.call_count = 0
+        with self.assertRaises(GitException):
+            api.install_webhooks(self.build_user, self.repo)
+        self.assertEqual(mock_post.call_count, 0)
+
         with self.settings(INSTALLED_GITSERVERS=[utils.gitlab_config(install_webhook=False)]):
             # this should just return
             api = self.server.api()
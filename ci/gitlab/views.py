@@ -17,7 +17,7 @@ from __future__ import unicode_literals, absolute_import
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 import logging, traceback
-from ci import models, PushEvent, PullRequestEvent, GitCommitData
+from ci import models, PushEvent, PullRequestEvent, GitCommitData, JsonUtils
 import json
 
 logger = logging.getLogger('ci')
@@ -209,7 +209,7 @@ def webhook(request, build_key):
         return HttpResponseNotAllowed(['POST'])
 
     try:
-        data = json.loads(request.body)
+        data = JsonUtils.loads(request.body)
     except ValueError:
         err_str = "Bad json in gitlab webhook request"
         logger.warning(err_str)
@@ -220,7 +220,7 @@ def webhook(request, build_key):
         logger.warning("No user with build key %s" % build_key)
         return HttpResponseBadRequest("Error")
 
-    if user.recipes.count() == 0:
+    if not user.recipes.exists():
         logger.warning("User '%s' does not have any recipes" % user)
         return HttpResponseBadRequest("Error")
 
@@ -229,7 +229,8 @@ def webhook(request, build_key):
 def process_event(user, json_data):
     ret = HttpResponse('OK')
     try:
-        logger.info('Webhook called:\n{}'.format(json.dumps(json_data, indent=2)))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Webhook called:\n%s', json.dumps(json_data, indent=2))
         object_kind = json_data.get("object_kind")
         if object_kind == 'merge_request':
             process_pull_request(user, json_data)
@@ -17,6 +17,7 @@ from __future__ import unicode_literals, absolute_import
 from django.core.management.base import BaseCommand
 from ci.tests import utils
 from ci.client import views
+from ci import JsonUtils
 from django.test.client import RequestFactory
 from django.test import override_settings
 from django.urls import reverse
@@ -55,7 +56,7 @@ class Command(BaseCommand):
                 test_dir = os.path.join(os.path.dirname(this_file), "..", "..", "..", "client", "tests")
                 fname = os.path.join(os.path.abspath(test_dir), "claim_response.json")
                 # to makes diffs better, hardcode job and recipe ids
-                data = json.loads(reply.content)
+                data = JsonUtils.loads(reply.content)
                 data["job_id"] = 1
                 data["job_info"]["job_id"] = 1
                 data["job_info"]["environment"]["job_id"] = 1
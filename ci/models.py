@@ -24,14 +24,13 @@ from ci.bitbucket import api as bitbucket_api
 from ci.bitbucket import oauth as bitbucket_auth
 from ci.github import api as github_api
 from ci.github import oauth as github_auth
-import random, re
+import random, re, gzip, base64
 from django.utils import timezone
 from datetime import timedelta, datetime
-from ci import TimeUtils
-import json
+from ci import TimeUtils, JsonUtils
 import ansi2html
 import logging
-from django.db.models import Sum
+from django.db.models import Sum, Case, When, Value
 logger = logging.getLogger('ci')
 
 class DBException(Exception):
@@ -351,6 +350,8 @@ class Event(models.Model):
         (MANUAL, 'Scheduled'),
         (RELEASE, 'Release'),
         )
+    # Statuses of a finished dependency that allow dependent jobs to run
+    PASSED_STATUSES = frozenset([JobStatus.FAILED_OK, JobStatus.SUCCESS, JobStatus.INTERMITTENT_FAILURE])
     description = models.CharField(max_length=200, default='', blank=True)
     # the user who initiated the event
     trigger_user = models.CharField(max_length=200, default='', blank=True)
@@ -396,22 +397,59 @@ class Event(models.Model):
     def user(self):
         return self.head.user()
 
+    @staticmethod
+    def encode_changed_files(file_list):
+        """
+        Input:
+          file_list[list]: List of file names
+        Return:
+          str: Value to store in changed_files
+        """
+        return JsonUtils.dumps(file_list, indent=True)
+
     def set_changed_files(self, file_list):
-        self.changed_files = json.dumps(file_list, indent=2)
+        self.changed_files = self.encode_changed_files(file_list)
 
     def get_changed_files(self):
         if not self.changed_files:
             return []
-        changed_files = json.loads(self.changed_files)
+        changed_files = JsonUtils.loads(self.changed_files)
         return changed_files
 
+    # base64 encoded gzip data always starts with this
+    GZIP_B64_PREFIX = "H4sI"
+
+    @staticmethod
+    def encode_json_data(data):
+        """
+        Encodes the JSON as base64 encoded gzip to keep the large webhook payloads small.
+        Input:
+          data: Object to serialize
+        Return:
+          str: Value to store in json_data. Empty if settings.SAVE_EVENT_JSON_DATA is off.
+        """
+        if not settings.SAVE_EVENT_JSON_DATA:
+            return ""
+        compressed = gzip.compress(JsonUtils.dumps(data).encode("utf-8"))
+        return base64.b64encode(compressed).decode("ascii")
+
     def set_json_data(self, data):
-        self.json_data = json.dumps(data, indent=2)
+        self.json_data = self.encode_json_data(data)
+
+    @property
+    def json_data_decoded(self):
+        """
+        The stored JSON as a string.
+        Older events stored plain JSON so that is returned as is.
+        """
+        if not self.json_data.startswith(self.GZIP_B64_PREFIX):
+            return self.json_data
+        return gzip.decompress(base64.b64decode(self.json_data)).decode("utf-8")
 
     def get_json_data(self):
         if not self.json_data:
             return None
-        data = json.loads(self.json_data)
+        data = JsonUtils.loads(self.json_data_decoded)
         return data
 
     def get_job_depends_on(self):
@@ -421,37 +459,55 @@ class Event(models.Model):
           dict: jobs are keys with a list of jobs as values
         """
         depends_on = {}
-        all_jobs = [j for j in self.jobs.all()]
+        if 'jobs' in getattr(self, '_prefetched_objects_cache', {}):
+            # The caller already loaded the jobs, like EventsStatus does
+            all_jobs = list(self.jobs.all())
+        else:
+            # Load the recipes and their dependencies up front so that
+            # we don't do a query per job.
+            all_jobs = list(self.jobs
+                    .select_related('recipe__repository', 'config')
+                    .prefetch_related('recipe__depends_on'))
+        jobs_by_filename = {}
+        for j in all_jobs:
+            jobs_by_filename.setdefault(j.recipe.filename, []).append(j)
+
         for j in all_jobs:
             deps = []
             for r in j.recipe.depends_on.all():
-                for j2 in all_jobs:
-                    if j2 != j and j2.recipe.filename == r.filename:
+                for j2 in jobs_by_filename.get(r.filename, []):
+                    if j2 != j:
                         deps.append(j2)
             depends_on[j] = deps
         return depends_on
 
-    def get_unrunnable_jobs(self):
+    def get_unrunnable_jobs(self, depends=None):
         """
         Get a list of jobs that won't run due to failed dependencies.
+        Input:
+          depends[dict]: Result of get_job_depends_on(). If None then it will be computed.
         Return:
           list[Job]: jobs that won't run
         """
         wont_run = []
-        depends = self.get_job_depends_on()
+        wont_run_pks = set()
+        if depends is None:
+            depends = self.get_job_depends_on()
         # We want to check the whole dependecy chain.
         # So if we have j0 -> j1 -> j2 and j0 fails
         # we want the list to have j1 and j2.
         while True:
             added = False
             for job, deps in depends.items():
-                if job in wont_run:
+                if job.pk in wont_run_pks:
                     continue
                 for d in deps:
-                    if (d in wont_run or
+                    if (d.pk in wont_run_pks or
                             (d.complete and d.status in [JobStatus.FAILED, JobStatus.CANCELED])):
                         wont_run.append(job)
+                        wont_run_pks.add(job.pk)
                         added = True
+                        break
             if not added:
                 break
         return wont_run
@@ -474,7 +530,7 @@ class Event(models.Model):
           list: Each entry is a list of sorted jobs
         """
         job_depends = self.get_job_depends_on()
-        added_jobs = set()
+        added_jobs = set() # pks of the jobs already in a group
         other = []
         job_groups = []
 
@@ -483,7 +539,7 @@ class Event(models.Model):
             new_other = []
             new_group = []
             for job in other:
-                deps = set(job_depends.get(job, []))
+                deps = set(d.pk for d in job_depends.get(job, []))
                 if deps.issubset(added_jobs):
                     new_group.append(job)
                 else:
@@ -496,18 +552,26 @@ class Event(models.Model):
                 other = []
             else:
                 other = new_other
-            added_jobs |= set(new_group)
+            added_jobs.update(j.pk for j in new_group)
             job_groups.append(self.sorted_jobs(new_group))
 
         return job_groups
 
-    def check_done(self):
+    def check_done(self, depends=None):
         """
         Check to see if the event is done running jobs
+        Input:
+          depends[dict]: Result of get_job_depends_on(). If None then it will be computed.
         """
-        unrunnable_jobs = self.get_unrunnable_jobs()
-        for j in self.jobs.all():
-            if not j.complete and j not in unrunnable_jobs:
+        # The dependency map already has all the jobs loaded so
+        # we don't need another query to check if they are complete.
+        if depends is None:
+            depends = self.get_job_depends_on()
+        if all(j.complete for j in depends.keys()):
+            return True
+        unrunnable_pks = set(j.pk for j in self.get_unrunnable_jobs(depends))
+        for j in depends.keys():
+            if not j.complete and j.pk not in unrunnable_pks:
                 return False
         return True
 
@@ -527,10 +591,7 @@ class Event(models.Model):
         assuming that the event is
         not done yet.
         """
-        status = set()
-        for job in self.jobs.all():
-            status.add(job.status)
-
+        status = set(self.jobs.values_list('status', flat=True))
         return incomplete_status(status)
 
     def set_status(self, status=None):
@@ -559,9 +620,10 @@ class Event(models.Model):
         """
         self.complete = True
         status = set()
-        unrunnable_jobs = self.get_unrunnable_jobs()
-        for j in self.jobs.all():
-            if j.complete and j not in unrunnable_jobs:
+        depends = self.get_job_depends_on()
+        unrunnable_pks = set(j.pk for j in self.get_unrunnable_jobs(depends))
+        for j in depends.keys():
+            if j.complete and j.pk not in unrunnable_pks:
                 status.add(j.status)
         self.set_status(complete_status(status))
 
@@ -573,28 +635,62 @@ class Event(models.Model):
         if so, then they are marked as ready.
         """
 
-        if self.check_done():
-            self.complete = True
-            self.save()
-            logger.info('Event {}: {} complete'.format(self.pk, self))
+        # If every job is already complete then there is nothing to make ready
+        # and we don't need to load the dependencies.
+        if not self.jobs.filter(complete=False).exists():
+            self._set_complete_flag()
             return
 
+        # Load the jobs once and use them for both checks
         job_depends = self.get_job_depends_on()
+        if self.check_done(job_depends):
+            self._set_complete_flag()
+            return
+
+        ready_jobs = []
+        # Jobs with the same recipe (different configs) have the same dependencies
+        # so only check them once per recipe.
+        ready_by_recipe = {}
         for job, deps in job_depends.items():
             if job.complete or job.ready or not job.active:
                 continue
-            ready = True
-            for d in deps:
-                if not d.complete or d.status not in [JobStatus.FAILED_OK, JobStatus.SUCCESS, JobStatus.INTERMITTENT_FAILURE]:
-                    logger.info('job {}: {} does not have depends met: {}'.format(job.pk, job, d))
-                    ready = False
-                    break
+            ready = ready_by_recipe.get(job.recipe_id)
+            if ready is None:
+                ready = True
+                for d in deps:
+                    if not d.complete or d.status not in self.PASSED_STATUSES:
+                        logger.info('job %s: %s does not have depends met: %s', job.pk, job, d)
+                        ready = False
+                        break
+                ready_by_recipe[job.recipe_id] = ready
 
             if ready:
                 job.ready = ready
-                job.save()
-                logger.info('{}: {}: {} : ready: {} : on {}'.format(job.event,
-                    job.pk, job, job.ready, job.recipe.repository))
+                ready_jobs.append(job)
+
+        if ready_jobs:
+            # Do a single UPDATE instead of saving each job.
+            # update() doesn't touch auto_now fields so set last_modified explicitly.
+            # Jobs are ordered by last_modified so give each one its own time,
+            # in the same order separate saves would have.
+            now = timezone.now()
+            stamps = [When(pk=j.pk, then=Value(now + timedelta(microseconds=i)))
+                    for i, j in enumerate(ready_jobs)]
+            Job.objects.filter(pk__in=[j.pk for j in ready_jobs]).update(ready=True,
+                    last_modified=Case(*stamps, output_field=models.DateTimeField()))
+            if logger.isEnabledFor(logging.INFO):
+                for job in ready_jobs:
+                    logger.info('%s: %s: %s : ready: %s : on %s', job.event,
+                        job.pk, job, job.ready, job.recipe.repository)
+
+    def _set_complete_flag(self):
+        """
+        Mark the event as complete, only writing the columns that changed.
+        """
+        self.complete = True
+        self.save(update_fields=['complete', 'last_modified'])
+        # Only the pk, formatting the event would load head, branch, repo and user
+        logger.info('Event %s complete', self.pk)
 
     def auto_cancel_event_except_current(self):
         return self.base.branch.get_branch_setting("auto_cancel_push_events_except_current", False)
@@ -644,6 +740,24 @@ class RecipeRepository(models.Model):
         except cls.DoesNotExist:
             return cls.objects.create(sha="")
 
+class RecipeQuerySet(models.QuerySet):
+    # Long text fields that aren't needed when creating jobs for an event
+    EVENT_DEFERRED_FIELDS = ('help_text', 'create_issue_on_fail_message')
+
+    def for_event(self, build_user, **kwargs):
+        """
+        Get the current, active recipes that an event could use.
+        Input:
+            build_user[GitUser]: The build user of the recipes
+            kwargs: Additional filters, like the cause or the repository
+        Return:
+            QuerySet of Recipe in priority order
+        """
+        return (self.filter(active=True, current=True, build_user=build_user, **kwargs)
+                .defer(*self.EVENT_DEFERRED_FIELDS)
+                .order_by('-priority', 'display_name')
+                .select_related('repository__user__server'))
+
 @python_2_unicode_compatible
 class Recipe(models.Model):
     """
@@ -704,6 +818,8 @@ class Recipe(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = RecipeQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -905,6 +1021,12 @@ class Job(models.Model):
         ordering = ["-last_modified"]
         get_latest_by = 'last_modified'
         unique_together = ['recipe', 'event', 'config']
+        # Jobs of an event are constantly filtered by these
+        indexes = [
+                models.Index(fields=['event', 'complete']),
+                models.Index(fields=['event', 'active']),
+                models.Index(fields=['event', 'ready']),
+                ]
 
     def __str__(self):
         return '{}:{}'.format(self.recipe.name, self.config.name)
@@ -955,10 +1077,7 @@ class Job(models.Model):
         Calculate the job status from the status of
         each step
         """
-        status = set()
-        for step_result in self.step_results.all():
-            status.add(step_result.status)
-        return complete_status(status)
+        return complete_status(self.step_results.values_list('status', flat=True))
 
     def set_status(self, status=None, calc_event=False):
         """
@@ -976,13 +1095,13 @@ class Job(models.Model):
             self.event.set_status(status)
 
     def set_invalidated(self, message, same_client=False, client=None, check_ready=False):
-        logger.info("Invalidating: %s : %s: %s" % (self.str_with_client(), self.pk, message))
+        logger.info("Invalidating: %s : %s: %s", self.str_with_client(), self.pk, message)
         old_recipe = self.recipe
         self.complete = False
         latest_recipe = (Recipe.objects.filter(filename=self.recipe.filename, current=True,
-            cause=self.recipe.cause).order_by('-created'))
-        if latest_recipe.count():
-            self.recipe = latest_recipe.first()
+            cause=self.recipe.cause).order_by('-created').first())
+        if latest_recipe:
+            self.recipe = latest_recipe
         self.invalidated = True
         self.same_client = same_client
         self.seconds = timedelta(seconds=0)
@@ -1000,7 +1119,7 @@ class Job(models.Model):
         JobChangeLog.objects.create(job=self, message=message)
         if check_ready:
             self.event.make_jobs_ready()
-        if old_recipe.jobs.count() == 0:
+        if not old_recipe.jobs.exists():
             old_recipe.delete()
 
     def init_pr_status(self):
@@ -1118,6 +1237,7 @@ class StepResult(models.Model):
     class Meta:
         unique_together = ['job', 'position']
         ordering = ['position',]
+        indexes = [models.Index(fields=['job', 'status'])]
 
     def status_slug(self):
         return JobStatus.to_slug(self.status)
@@ -1145,39 +1265,46 @@ def incomplete_status(status):
     Input:
         set[JobStatus]: The set of statuses
     """
-    if status == set([JobStatus.NOT_STARTED]):
-        return JobStatus.NOT_STARTED
-    if status == set([JobStatus.CANCELED]):
-        return JobStatus.CANCELED
+    if len(status) == 1:
+        only = next(iter(status))
+        if only in (JobStatus.NOT_STARTED, JobStatus.CANCELED):
+            return only
     if JobStatus.RUNNING in status:
         return JobStatus.RUNNING
     if JobStatus.ACTIVATION_REQUIRED in status:
         return JobStatus.ACTIVATION_REQUIRED
     return JobStatus.RUNNING
 
+# Highest priority first. Anything not in here (ie NOT_STARTED) is ignored.
+COMPLETE_STATUS_PRIORITY = (JobStatus.RUNNING,
+        JobStatus.ACTIVATION_REQUIRED,
+        JobStatus.FAILED,
+        JobStatus.CANCELED,
+        JobStatus.INTERMITTENT_FAILURE,
+        JobStatus.FAILED_OK,
+        JobStatus.SUCCESS,
+        )
+_COMPLETE_STATUS_RANK = dict((s, i) for i, s in enumerate(COMPLETE_STATUS_PRIORITY))
+
 def complete_status(status):
     """
     Intended for the status of a completed set of statuses.
     Input:
-        set[JobStatus]: The set of statuses
+        iterable[JobStatus]: The statuses. Duplicates are fine.
     """
-    if status == set([JobStatus.NOT_STARTED]):
+    best = None
+    for s in status:
+        rank = _COMPLETE_STATUS_RANK.get(s)
+        if rank is None:
+            continue
+        if rank == 0:
+            # Nothing can override the highest priority so stop looking
+            return COMPLETE_STATUS_PRIORITY[0]
+        if best is None or rank < best:
+            best = rank
+    if best is None:
         return JobStatus.NOT_STARTED
-    if JobStatus.RUNNING in status:
-        return JobStatus.RUNNING
-    if JobStatus.ACTIVATION_REQUIRED in status:
-        return JobStatus.ACTIVATION_REQUIRED
-    if JobStatus.FAILED in status:
-        return JobStatus.FAILED
-    if JobStatus.CANCELED in status:
-        return JobStatus.CANCELED
-    if JobStatus.INTERMITTENT_FAILURE in status:
-        return JobStatus.INTERMITTENT_FAILURE
-    if JobStatus.FAILED_OK in status:
-        return JobStatus.FAILED_OK
-    if JobStatus.SUCCESS in status:
-        return JobStatus.SUCCESS
-    return JobStatus.NOT_STARTED
+    return COMPLETE_STATUS_PRIORITY[best]
 
 @python_2_unicode_compatible
 class RepositoryBadge(models.Model):
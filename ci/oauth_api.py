@@ -16,13 +16,30 @@
 from __future__ import unicode_literals, absolute_import
 from django.shortcuts import redirect
 from requests_oauthlib import OAuth2Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.contrib import messages
 import ci.models
+from ci import JsonUtils
 import json
 import logging
 
 logger = logging.getLogger('ci')
 
+# Connection pool size for each user session
+SESSION_POOL_MAXSIZE = 32
+
+def session_retry():
+    """
+    Retry policy for API sessions. Only idempotent requests are retried and
+    the last response is returned instead of raising so that the callers
+    still see the status code.
+    """
+    return Retry(total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False)
+
 class OAuthException(Exception):
     pass
 
@@ -133,7 +150,7 @@ class OAuth(object):
         Convert it and return it.
         """
         if user.token:
-            return json.loads(user.token)
+            return JsonUtils.loads(user.token)
         return None
 
     def start_session_for_user(self, user):
@@ -154,13 +171,19 @@ class OAuth(object):
         def token_updater(token):
             update_user_token(user, token)
 
-        return OAuth2Session(
+        oauth_session = OAuth2Session(
             self._client_id,
             token=token,
             auto_refresh_url=self._token_url,
             auto_refresh_kwargs=extra,
             token_updater=token_updater,
             )
+        # All the API calls for a user go through this session so
+        # keep the connections around and retry on gateway errors.
+        adapter = HTTPAdapter(pool_maxsize=SESSION_POOL_MAXSIZE, max_retries=session_retry())
+        oauth_session.mount("https://", adapter)
+        oauth_session.mount("http://", adapter)
+        return oauth_session
 
     def set_browser_session_from_user(self, session, user):
         """
@@ -21,23 +21,48 @@ from ci.tests import utils
 from django.test.client import RequestFactory
 
 class DBCompare(object):
-    def create_default_recipes(self, server_type=settings.GITSERVER_GITHUB):
-        self.set_counts()
-        self.server = utils.create_git_server(host_type=server_type)
-        self.build_user = utils.create_user_with_token(name="moosebuild", server=self.server)
-        self.owner = utils.create_user(name="owner", server=self.server)
-        self.repo = utils.create_repo(name="repo", user=self.owner)
-        self.branch = utils.create_branch(name="devel", repo=self.repo)
-        pr = utils.create_recipe(name="PR Base", user=self.build_user, repo=self.repo)
-        pr1 = utils.create_recipe(name="PR With Dep", user=self.build_user, repo=self.repo)
+    @staticmethod
+    def _create_default_recipes(server_type=settings.GITSERVER_GITHUB):
+        """
+        Creates the default recipes and the records they need.
+        Return:
+          tuple: (server, build_user, owner, repo, branch)
+        """
+        server = utils.create_git_server(host_type=server_type)
+        build_user = utils.create_user_with_token(name="moosebuild", server=server)
+        owner = utils.create_user(name="owner", server=server)
+        repo = utils.create_repo(name="repo", user=owner)
+        branch = utils.create_branch(name="devel", repo=repo)
+        pr = utils.create_recipe(name="PR Base", user=build_user, repo=repo)
+        pr1 = utils.create_recipe(name="PR With Dep", user=build_user, repo=repo)
         pr1.depends_on.add(pr)
-        push = utils.create_recipe(name="Push Base", user=self.build_user, repo=self.repo, branch=self.branch, cause=models.Recipe.CAUSE_PUSH)
-        push1 = utils.create_recipe(name="Push With Dep", user=self.build_user, repo=self.repo, branch=self.branch, cause=models.Recipe.CAUSE_PUSH)
+        push = utils.create_recipe(name="Push Base", user=build_user, repo=repo, branch=branch, cause=models.Recipe.CAUSE_PUSH)
+        push1 = utils.create_recipe(name="Push With Dep", user=build_user, repo=repo, branch=branch, cause=models.Recipe.CAUSE_PUSH)
         push1.depends_on.add(push)
-        alt_pr = utils.create_recipe(name="Alt PR with dep", user=self.build_user, repo=self.repo, cause=models.Recipe.CAUSE_PULL_REQUEST_ALT)
+        alt_pr = utils.create_recipe(name="Alt PR with dep", user=build_user, repo=repo, cause=models.Recipe.CAUSE_PULL_REQUEST_ALT)
         alt_pr.depends_on.add(pr)
 
-        utils.create_recipe(name="Manual", user=self.build_user, repo=self.repo, branch=self.branch, cause=models.Recipe.CAUSE_MANUAL)
+        utils.create_recipe(name="Manual", user=build_user, repo=repo, branch=branch, cause=models.Recipe.CAUSE_MANUAL)
+        return server, build_user, owner, repo, branch
+
+    def load_default_recipes(self, records):
+        """
+        Use default recipes created in setUpTestData().
+        The records are reloaded so that changes in one test don't leak into the next.
+        Input:
+          records[tuple]: Return value of _create_default_recipes()
+        """
+        server, build_user, owner, repo, branch = records
+        self.server = models.GitServer.objects.get(pk=server.pk)
+        self.build_user = models.GitUser.objects.get(pk=build_user.pk)
+        self.owner = models.GitUser.objects.get(pk=owner.pk)
+        self.repo = models.Repository.objects.get(pk=repo.pk)
+        self.branch = models.Branch.objects.get(pk=branch.pk)
+
+    def create_default_recipes(self, server_type=settings.GITSERVER_GITHUB):
+        self.set_counts()
+        records = self._create_default_recipes(server_type)
+        self.server, self.build_user, self.owner, self.repo, self.branch = records
         self.compare_counts(recipes=6,
             deps=3,
             current=6,
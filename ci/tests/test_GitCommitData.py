@@ -65,6 +65,42 @@ class Tests(DBTester.DBTester):
         s = str(gitcommit)
         self.assertIn(gitcommit.owner, s)
 
+    def test_create_pair(self):
+        server = utils.create_git_server()
+        base = GitCommitData.GitCommitData('owner', 'repo', 'branch', '1', 'ssh_url', server)
+        head = GitCommitData.GitCommitData('owner', 'repo', 'branch', '2', 'ssh_url', server)
+        # Same branch so only one set of user, repo, branch
+        self.set_counts()
+        base_commit, head_commit = GitCommitData.GitCommitData.create_pair(base, head)
+        self.compare_counts(users=1, repos=1, branches=1, commits=2)
+        self.assertEqual(base_commit.branch, head_commit.branch)
+        self.assertEqual(base_commit.sha, '1')
+        self.assertEqual(head_commit.sha, '2')
+        self.assertTrue(base.branch_created)
+        self.assertFalse(head.branch_created)
+
+        # Everything exists
+        base = GitCommitData.GitCommitData('owner', 'repo', 'branch', '1', 'ssh_url', server)
+        head = GitCommitData.GitCommitData('owner', 'repo', 'branch', '2', 'ssh_url', server)
+        self.set_counts()
+        self.assertEqual(GitCommitData.GitCommitData.create_pair(base, head), (base_commit, head_commit))
+        self.compare_counts()
+        self.assertFalse(base.commit_created)
+        self.assertFalse(head.commit_created)
+
+        # Different repos
+        head = GitCommitData.GitCommitData('other', 'repo', 'branch', '2', 'ssh_url', server)
+        self.set_counts()
+        base_commit2, head_commit2 = GitCommitData.GitCommitData.create_pair(base, head)
+        self.compare_counts(users=1, repos=1, branches=1, commits=1)
+        self.assertEqual(base_commit2, base_commit)
+        self.assertNotEqual(head_commit2, head_commit)
+
+        # Removing head only removes what it created
+        head.remove()
+        self.compare_counts()
+        self.assertEqual(models.Commit.objects.filter(pk=base_commit.pk).count(), 1)
+
     def test_remove(self):
         commit = utils.create_commit()
         gitcommit = GitCommitData.GitCommitData(
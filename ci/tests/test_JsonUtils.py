@@ -0,0 +1,61 @@
+
+# Copyright 2016 Battelle Energy Alliance, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import unicode_literals, absolute_import
+from django.test import SimpleTestCase
+from ci import JsonUtils
+from mock import patch
+import datetime
+
+class Tests(SimpleTestCase):
+    def test_dumps(self):
+        self.check_dumps()
+        # Without orjson the standard json module is used
+        with patch.object(JsonUtils, "orjson", None):
+            self.check_dumps()
+
+    def check_dumps(self):
+        data = {"foo": [1, 2], "bar": "baz"}
+        compact = JsonUtils.dumps(data)
+        self.assertNotIn("\n", compact)
+        self.assertEqual(JsonUtils.loads(compact), data)
+
+        pretty = JsonUtils.dumps(data, indent=True)
+        self.assertIn("\n", pretty)
+        self.assertEqual(JsonUtils.loads(pretty), data)
+
+        # datetimes are serialized the same way as Django does it
+        when = datetime.datetime(2017, 1, 2, 3, 4, 5)
+        self.assertEqual(JsonUtils.dumps({"when": when}), '{"when":"2017-01-02T03:04:05"}')
+
+    def test_loads(self):
+        self.check_loads()
+        with patch.object(JsonUtils, "orjson", None):
+            self.check_loads()
+
+    def check_loads(self):
+        self.assertEqual(JsonUtils.loads(b'{"foo": 1}'), {"foo": 1})
+        self.assertEqual(JsonUtils.loads('["foo"]'), ["foo"])
+        with self.assertRaises(ValueError):
+            JsonUtils.loads(b'{"foo": ')
+
+    def test_json_response(self):
+        response = JsonUtils.JsonResponse({"foo": [1, 2]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(JsonUtils.loads(response.content), {"foo": [1, 2]})
+
+        response = JsonUtils.JsonResponse({"foo": "bar"}, status=400)
+        self.assertEqual(response.status_code, 400)
@@ -287,6 +287,20 @@ class Tests(DBTester.DBTester):
             self.assertEqual(ev.jobs.filter(active=False).count(), 1)
             self.assertEqual(mock_comment.call_count, 1)
 
+    @patch.object(api.GitHubAPI, 'pr_comment')
+    def test_manual_single_comment(self, mock_comment):
+        """
+        Multiple jobs that need activation only get one comment
+        """
+        c1_data, c2_data, pr = self.create_pr_data()
+        models.Recipe.objects.filter(cause=models.Recipe.CAUSE_PULL_REQUEST).update(automatic=models.Recipe.MANUAL)
+
+        with self.settings(INSTALLED_GITSERVERS=[utils.github_config(post_job_status=True)]):
+            pr.save()
+            ev = models.Event.objects.order_by('-created').first()
+            self.assertEqual(ev.jobs.filter(active=False).count(), 2)
+            self.assertEqual(mock_comment.call_count, 1)
+
     @patch.object(api.GitHubAPI, 'is_collaborator')
     def test_authorized_success(self, mock_is_collaborator):
         """
@@ -14,12 +14,11 @@
 # limitations under the License.
 
 from __future__ import unicode_literals, absolute_import
-from ci import models, PushEvent, GitCommitData
+from ci import models, PushEvent, GitCommitData, JsonUtils
 from ci.tests import DBTester, utils
 from django.test import override_settings
 from ci.client import views as client_views
 from ci.client import UpdateRemoteStatus
-import json
 
 class Tests(DBTester.DBTester):
     def setUp(self):
@@ -233,7 +232,7 @@ class Tests(DBTester.DBTester):
     def get_ready_job_pks(self, expected):
         request = self.factory.get("/")
         ready_jobs = client_views.ready_jobs(request, self.build_user.build_key, "some_client")
-        jobs_json = json.loads(ready_jobs.content)
+        jobs_json = JsonUtils.loads(ready_jobs.content)
         ready_pks = []
         for job in jobs_json["jobs"]:
             ready_pks.append(job["id"])
@@ -54,6 +54,14 @@ class Tests(DBTester.DBTester):
         self.job0.event.make_jobs_ready()
         self.compare_counts(num_events_completed=1)
 
+        # Everything is complete so the dependencies aren't loaded.
+        # Just the check for incomplete jobs and the event update.
+        ev = models.Event.objects.get(pk=self.job0.event.pk)
+        self.set_counts()
+        with self.assertNumQueries(2):
+            ev.make_jobs_ready()
+        self.compare_counts()
+
     def test_make_jobs_ready_first_failed(self):
         # first one failed so jobs that depend on it
         # shouldn't be marked as ready
@@ -355,6 +363,49 @@ class Tests(DBTester.DBTester):
             self.assertEqual(j.status, models.JobStatus.CANCELED)
             self.assertTrue(j.complete)
 
+    def test_create_jobs(self):
+        ev = utils.create_event()
+        self.assertEqual(event.create_jobs(ev, []), [])
+
+        recipes = [utils.create_recipe(name="recipe %s" % i, user=ev.build_user) for i in range(2)]
+        config = utils.create_build_config()
+        new_jobs = [models.Job(recipe=r, event=ev, config=config) for r in recipes]
+        self.set_counts()
+        jobs = event.create_jobs(ev, new_jobs)
+        self.compare_counts(jobs=2, active=2)
+        self.assertEqual([j.recipe for j in jobs], recipes)
+        for j in jobs:
+            self.assertIsNotNone(j.pk)
+
+        # Already existing jobs are ignored and not returned
+        new_jobs = [models.Job(recipe=r, event=ev, config=config) for r in recipes]
+        self.set_counts()
+        jobs = event.create_jobs(ev, new_jobs)
+        self.compare_counts()
+        self.assertEqual(jobs, [])
+
+        # Only the jobs that this call created are returned.
+        # Like another request creating one of them first.
+        recipes = [utils.create_recipe(name="other recipe %s" % i, user=ev.build_user) for i in range(2)]
+        other = utils.create_job(recipe=recipes[0], event=ev, config=config)
+        new_jobs = [models.Job(recipe=r, event=ev, config=config) for r in recipes]
+        self.set_counts()
+        jobs = event.create_jobs(ev, new_jobs)
+        self.compare_counts(jobs=1, active=1)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].recipe, recipes[1])
+        self.assertNotEqual(jobs[0].pk, other.pk)
+
+    def test_prefetch_build_configs(self):
+        recipes = [utils.create_recipe(name="recipe %s" % i) for i in range(2)]
+        recipes[0].build_configs.add(utils.create_build_config(name="a config"))
+        recipes = [models.Recipe.objects.get(pk=r.pk) for r in recipes]
+        with self.assertNumQueries(1):
+            event.prefetch_build_configs(recipes)
+        with self.assertNumQueries(0):
+            names = [[c.name for c in r.build_configs.all()] for r in recipes]
+        self.assertEqual(names, [["a config", "testBuildConfig"], ["testBuildConfig"]])
+
     def test_get_active_labels(self):
         with self.settings(INSTALLED_GITSERVERS=[utils.github_config(recipe_label_activation=utils.default_labels())]):
             all_docs = ["docs/foo", "docs/bar", "docs/foobar"]
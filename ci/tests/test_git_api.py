@@ -88,3 +88,19 @@ class Tests(DBTester.DBTester):
         mock_get.side_effect = [response3, response4]
         data = self.api.get_all_pages("url")
         self.assertEqual(data, data3)
+
+    @patch.object(requests, 'get')
+    def test_iter_all_pages(self, mock_get):
+        response0 = utils.Response(["foo", "bar"], use_links=True)
+        response1 = utils.Response(["baz"])
+        mock_get.side_effect = [response0, response1]
+        data = self.api.iter_all_pages("url")
+        self.assertEqual(next(data), "foo")
+        self.assertEqual(next(data), "bar")
+        # The next page isn't requested until it is needed
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(list(data), ["baz"])
+        self.assertEqual(mock_get.call_count, 2)
+
+        mock_get.side_effect = Exception("Bam!")
+        self.assertIsNone(self.api.iter_all_pages("url"))
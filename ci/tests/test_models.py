@@ -255,6 +255,19 @@ class Tests(TestCase):
         event.set_json_data(json_data)
         event.save()
         self.assertEqual(event.get_json_data(), json_data)
+        self.assertTrue(event.json_data.startswith(models.Event.GZIP_B64_PREFIX))
+        self.assertEqual(event.json_data_decoded, '["foo"]')
+
+        # Older events have plain JSON
+        event.json_data = '{"foo": "bar"}'
+        event.save()
+        self.assertEqual(event.get_json_data(), {"foo": "bar"})
+        self.assertEqual(event.json_data_decoded, '{"foo": "bar"}')
+
+        with self.settings(SAVE_EVENT_JSON_DATA=False):
+            event.set_json_data(json_data)
+            self.assertEqual(event.json_data, "")
+            self.assertEqual(event.get_json_data(), None)
 
     def test_pullrequest(self):
         pr = utils.create_pr()
@@ -286,6 +299,25 @@ class Tests(TestCase):
     def dependency_str(self):
         return ', '.join([ dep.display_name for dep in self.depends_on.all() ])
 
+    def test_recipe_for_event(self):
+        r0 = utils.create_recipe(name="r0")
+        r1 = utils.create_recipe(name="r1", user=r0.build_user, repo=r0.repository)
+        r1.priority = 10
+        r1.save()
+        r2 = utils.create_recipe(name="r2", user=r0.build_user, repo=r0.repository)
+        r2.active = False
+        r2.save()
+        utils.create_recipe(name="r3", user=r0.build_user, repo=r0.repository, current=False)
+        utils.create_recipe(name="r4", user=utils.create_user_with_token(name="other"), repo=r0.repository)
+
+        recipes = list(models.Recipe.objects.for_event(r0.build_user, repository=r0.repository))
+        # Highest priority first, inactive, old and other build users excluded
+        self.assertEqual(recipes, [r1, r0])
+        self.assertEqual(recipes[0].get_deferred_fields(), set(models.RecipeQuerySet.EVENT_DEFERRED_FIELDS))
+
+        recipes = models.Recipe.objects.for_event(r0.build_user, cause=models.Recipe.CAUSE_PUSH)
+        self.assertFalse(recipes.exists())
+
     def test_recipeenv(self):
         renv = utils.create_recipe_environment()
         self.assertTrue(isinstance(renv, models.RecipeEnvironment))
@@ -478,6 +510,31 @@ class Tests(TestCase):
         for i in models.JobStatus.SHORT_CHOICES:
             self.assertEqual(models.JobStatus.to_slug(i[0]), i[1])
 
+    def test_complete_status(self):
+        self.assertEqual(models.complete_status(set()), models.JobStatus.NOT_STARTED)
+        self.assertEqual(models.complete_status(set([models.JobStatus.NOT_STARTED])), models.JobStatus.NOT_STARTED)
+        self.assertEqual(models.complete_status(set([models.JobStatus.NOT_STARTED, models.JobStatus.SUCCESS])),
+                models.JobStatus.SUCCESS)
+        self.assertEqual(models.complete_status(set([models.JobStatus.SUCCESS, models.JobStatus.FAILED_OK])),
+                models.JobStatus.FAILED_OK)
+        self.assertEqual(models.complete_status(set([models.JobStatus.CANCELED, models.JobStatus.FAILED])),
+                models.JobStatus.FAILED)
+        self.assertEqual(models.complete_status(set([models.JobStatus.FAILED, models.JobStatus.RUNNING])),
+                models.JobStatus.RUNNING)
+        # Any iterable works and duplicates don't matter
+        self.assertEqual(models.complete_status([models.JobStatus.SUCCESS, models.JobStatus.FAILED_OK,
+            models.JobStatus.SUCCESS]), models.JobStatus.FAILED_OK)
+
+    def test_incomplete_status(self):
+        self.assertEqual(models.incomplete_status(set([models.JobStatus.NOT_STARTED])), models.JobStatus.NOT_STARTED)
+        self.assertEqual(models.incomplete_status(set([models.JobStatus.CANCELED])), models.JobStatus.CANCELED)
+        self.assertEqual(models.incomplete_status(set([models.JobStatus.SUCCESS])), models.JobStatus.RUNNING)
+        self.assertEqual(models.incomplete_status(set([models.JobStatus.NOT_STARTED, models.JobStatus.ACTIVATION_REQUIRED])),
+                models.JobStatus.ACTIVATION_REQUIRED)
+        self.assertEqual(models.incomplete_status(set([models.JobStatus.RUNNING, models.JobStatus.ACTIVATION_REQUIRED])),
+                models.JobStatus.RUNNING)
+        self.assertEqual(models.incomplete_status(set()), models.JobStatus.RUNNING)
+
     def test_osversion(self):
         os, created = models.OSVersion.objects.get_or_create(name="os", version="1")
         self.assertIn("os", os.__str__())
@@ -43,3 +43,12 @@ class OAuthTestCase(TestCase):
         user.refresh_from_db()
         self.assertEqual(user.token, json.dumps(token_json))
         self.assertEqual(session[oauth._token_key], token_json)
+
+    def test_start_session_for_user(self):
+        user = utils.get_test_user()
+        session = user.auth().start_session_for_user(user)
+        adapter = session.get_adapter("https://api.github.com")
+        self.assertIs(adapter, session.get_adapter("http://localhost"))
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertFalse(adapter.max_retries.raise_on_status)
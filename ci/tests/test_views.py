@@ -25,9 +25,14 @@ from requests_oauthlib import OAuth2Session
 
 @override_settings(INSTALLED_GITSERVERS=[utils.github_config()])
 class Tests(DBTester.DBTester):
+    @classmethod
+    def setUpTestData(cls):
+        # Only create these once for the whole class
+        cls.default_records = DBTester.DBTester._create_default_recipes()
+
     def setUp(self):
         super(Tests, self).setUp()
-        self.create_default_recipes()
+        self.load_default_recipes(self.default_records)
 
     def test_main(self):
         """
@@ -18,10 +18,22 @@ from django.conf import settings
 from django.test import override_settings
 from ci import models
 import tempfile
-import shutil
 import os
 import json
 import subprocess
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+
+# Removing the recipe git repos is slow so it is done in the background
+# while the next test runs.
+_cleanup_executor = None
+
+def _cleanup_in_background(func):
+    global _cleanup_executor
+    if _cleanup_executor is None:
+        _cleanup_executor = ThreadPoolExecutor(max_workers=2)
+        atexit.register(_cleanup_executor.shutdown, wait=True)
+    _cleanup_executor.submit(func)
 
 def base_git_config(authorized_users=[],
         post_job_status=False,
@@ -264,7 +276,8 @@ def create_recipe_dir():
 
 class RecipeDir(object):
     def __init__(self):
-        self.name = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.name = self._tmp.name
         settings.RECIPE_BASE_DIR = self.name
         create_recipes(self.name)
 
@@ -276,7 +289,7 @@ class RecipeDir(object):
         return self.name
 
     def __exit__(self, exc, value, tb):
-        shutil.rmtree(self.name)
+        _cleanup_in_background(self._tmp.cleanup)
 
 def create_recipes(recipe_dir):
     subprocess.check_output(["git", "init"], cwd=recipe_dir)
@@ -299,6 +312,7 @@ class Response(object):
         self.status_code = status_code
         self.do_raise = do_raise
         self.reason = "some reason"
+        self.headers = {}
         if use_links:
             self.links = {'next': {'url': 'next_url'}}
         else:
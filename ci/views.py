@@ -260,7 +260,7 @@ def view_event(request, event_id):
     ev = get_object_or_404(EventsStatus.events_with_head(), pk=event_id)
     evs_info = EventsStatus.multiline_events_info([ev])
     allowed = Permissions.is_collaborator(request.session, ev.build_user, ev.base.repo())
-    has_unactivated = ev.jobs.filter(active=False).count() != 0
+    has_unactivated = ev.jobs.filter(active=False).exists()
     context = {'event': ev,
         'events': evs_info,
         'allowed_to_cancel': allowed,
@@ -460,7 +460,7 @@ def view_user(request, username):
         username[str]: Name of the user
     """
     users = models.GitUser.objects.filter(name=username)
-    if users.count() == 0:
+    if not users.exists():
         raise Http404('Bad username')
 
     repos = RepositoryStatus.get_user_repos_with_open_prs_status(username)
@@ -773,12 +773,12 @@ def activate_event(request, event_id):
         return HttpResponseNotAllowed(['POST'])
 
     ev = get_object_or_404(models.Event, pk=event_id)
-    jobs = ev.jobs.filter(active=False).order_by('-created')
-    if jobs.count() == 0:
+    jobs = list(ev.jobs.filter(active=False).select_related('recipe__repository').order_by('-created'))
+    if not jobs:
         messages.info(request, 'No jobs to activate')
         return redirect('ci:view_event', event_id=ev.pk)
 
-    repo = jobs.first().recipe.repository
+    repo = jobs[0].recipe.repository
     user = repo.server().signed_in_user(request.session)
     if not user:
         raise PermissionDenied('You need to be signed in to activate jobs')
@@ -786,7 +786,7 @@ def activate_event(request, event_id):
     collab = Permissions.is_collaborator(request.session, ev.build_user, repo, user=user)
     if collab:
         activated_jobs = []
-        for j in jobs.all():
+        for j in jobs:
             if set_job_active(request, j, user):
                 activated_jobs.append(j)
         for j in activated_jobs:
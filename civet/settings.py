@@ -244,6 +244,11 @@ GITSERVER_BITBUCKET = 2
 # recheck.
 COLLABORATOR_CACHE_TIMEOUT = 60*60
 
+# Whether to store the full webhook payload on each event.
+# It is only useful for debugging and can be large, so
+# by default it is only stored when DEBUG is on.
+SAVE_EVENT_JSON_DATA = DEBUG
+
 # The absolute url for the server. This is used
 # in places where we need to send links to outside
 # sources that will point to the server and we
@@ -18,31 +18,39 @@ import logging, logging.handlers
 from client.JobGetter import JobGetter
 from client.JobRunner import JobRunner
 from client.ServerUpdater import ServerUpdater
-from client.InterruptHandler import InterruptHandler
+from client.InterruptHandler import InterruptHandler, CANCEL, GRACEFUL
 import os, signal
+import select
 import time
-import traceback
+import requests
+from requests.adapters import HTTPAdapter
 
 import logging
 logger = logging.getLogger("civet_client")
 
-from threading import Thread
+from threading import Thread, Event, Lock
 try:
     from queue import Queue
 except ImportError:
     from Queue import Queue
 
+# Signals that cancel the running job and signals that stop the client
+# once the current job is done.
+# On Windows, SIGUSR1 and SIGUSR2 are not defined so they are just left out.
+_CANCEL_SIGS = [getattr(signal, name) for name in ("SIGUSR1", "SIGINT") if hasattr(signal, name)]
+_GRACEFUL_SIGS = [getattr(signal, name) for name in ("SIGUSR2",) if hasattr(signal, name)]
+
+# Makes setup_logger() safe to call from multiple threads
+_setup_lock = Lock()
+
 def has_handler(handler_type):
     """
     Check to see if a handler is already installed.
     Normally this isn't a problem but when running tests it might be.
+    The types have to match exactly, a subclass doesn't count.
     """
-    for h in logger.handlers:
-        # Use type instead of isinstance since the types have
-        # to match exactly
-        if type(h) == handler_type:
-            return True
-    return False
+    types = getattr(logger, "_civet_handler_types", None)
+    return types is not None and handler_type in types
 
 def setup_logger(log_file=None):
     """
@@ -50,24 +58,55 @@ def setup_logger(log_file=None):
     Input:
       log_file: If not None then a RotatingFileHandler is installed. Otherwise a logger to console is used.
     """
-    formatter = logging.Formatter('%(asctime)-15s:%(levelname)s:%(message)s')
-    fhandler = None
-    if log_file:
-        if has_handler(logging.handlers.RotatingFileHandler):
-            return
-        fhandler = logging.handlers.RotatingFileHandler(log_file, maxBytes=1024*1024*5, backupCount=5)
-    else:
-        if has_handler(logging.StreamHandler):
-            return
-        fhandler = logging.StreamHandler()
+    # Hold the lock for the whole check and add so that two callers
+    # can't both install the same type of handler.
+    with _setup_lock:
+        formatter = logging.Formatter('%(asctime)-15s:%(levelname)s:%(message)s')
+        fhandler = None
+        if log_file:
+            if has_handler(logging.handlers.RotatingFileHandler):
+                return
+            fhandler = logging.handlers.RotatingFileHandler(log_file, maxBytes=1024*1024*5, backupCount=5)
+        else:
+            if has_handler(logging.StreamHandler):
+                return
+            fhandler = logging.StreamHandler()
 
-    fhandler.setFormatter(formatter)
-    logger.addHandler(fhandler)
-    logger.setLevel(logging.DEBUG)
+        fhandler.setFormatter(formatter)
+        logger.addHandler(fhandler)
+        logger._civet_handler_types = getattr(logger, "_civet_handler_types", set()) | set([type(fhandler)])
+        logger.setLevel(logging.DEBUG)
+        # Our handlers write everything so don't send it to the root logger as well
+        logger.propagate = False
 
 class ClientException(Exception):
     pass
 
+def drain_queue(q):
+    """
+    Remove everything from a Queue while holding its lock
+    and keep its task counter consistent.
+    Input:
+      q: Queue to clear
+    """
+    with q.mutex:
+        q.queue.clear()
+        q.unfinished_tasks = 0
+        q.all_tasks_done.notify_all()
+        q.not_full.notify_all()
+
+def set_nonblocking(fd):
+    """
+    Make a file descriptor non blocking.
+    """
+    try:
+        os.set_blocking(fd, False)
+    except AttributeError:
+        # Python 2
+        import fcntl
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
 class BaseClient(object):
     """
     This is the job server client. It polls the server
@@ -92,19 +131,70 @@ class BaseClient(object):
 
         setup_logger(self.client_info["log_file"])
 
+        self._sig = InterruptHandler(self.command_q)
+        try:
+            for sig in _CANCEL_SIGS:
+                self._sig.register(sig, CANCEL)
+            for sig in _GRACEFUL_SIGS:
+                self._sig.register(sig, GRACEFUL)
+        except ValueError:
+            # Handlers can only be installed on the main thread.
+            # Without them the signals just keep their default action.
+            pass
+
+        # Self-pipe so that a signal wakes up the poll wait.
+        # The interpreter writes a byte to the wakeup fd when any signal arrives,
+        # even if it arrives just before we start waiting.
+        # close() puts back the wakeup fd that was set before us.
+        self._wake_r = None
+        self._wake_w = None
+        self._old_wakeup_fd = -1
+        wake_r = wake_w = None
         try:
-            self.cancel_signal = InterruptHandler(self.command_q, sig=[signal.SIGUSR1, signal.SIGINT])
-            self.graceful_signal = InterruptHandler(self.command_q, sig=[signal.SIGUSR2])
-        except:
-            # On Windows, SIGUSR1, SIGUSR2 are not defined. Signals don't
-            # work in general so this is the easiest way to disable
-            # them but leave all the code in place.
-            self.cancel_signal = InterruptHandler(self.command_q, sig=[])
-            self.graceful_signal = InterruptHandler(self.command_q, sig=[])
+            wake_r, wake_w = os.pipe()
+            set_nonblocking(wake_r)
+            set_nonblocking(wake_w)
+            self._old_wakeup_fd = signal.set_wakeup_fd(wake_w)
+            self._wake_r = wake_r
+            self._wake_w = wake_w
+        except Exception:
+            # Not on the main thread or not supported on this platform.
+            # wait_for_poll() will just sleep.
+            for fd in (wake_r, wake_w):
+                if fd is not None:
+                    os.close(fd)
 
         if self.client_info["ssl_cert"]:
             self.client_info["ssl_verify"] = self.client_info["ssl_cert"]
 
+        # Shared by the JobGetter and ServerUpdater so that connections
+        # to the server are kept alive between requests.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # JobGetter doesn't keep any state between polls and reads
+        # client_info when it is used, so we only need one.
+        self.job_getter = JobGetter(self.client_info, session=self.session)
+
+    def close(self):
+        """
+        Restores the signal handlers and wakeup fd that were set before
+        this client and closes the wakeup pipe. Safe to call more than once.
+        """
+        self._sig.restore()
+        if self._wake_w is None:
+            return
+        try:
+            signal.set_wakeup_fd(self._old_wakeup_fd)
+        except ValueError:
+            # Not on the main thread
+            pass
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._wake_r = None
+        self._wake_w = None
+
     def set_log_dir(self, log_dir):
         """
         Sets the log dir. If log_dir is set
@@ -116,7 +206,7 @@ class BaseClient(object):
 
         log_dir = os.path.abspath(log_dir)
         self.check_log_dir(log_dir)
-        self.client_info["log_file"] = "%s/civet_client_%s.log" % (log_dir, self.client_info["client_name"])
+        self.client_info["log_file"] = os.path.join(log_dir, "civet_client_%s.log" % self.client_info["client_name"])
 
     def check_log_dir(self, log_dir):
         """
@@ -153,37 +243,67 @@ class BaseClient(object):
         job_info = claimed["job_info"]
         job_id = job_info["job_id"]
         message_q = Queue()
-        runner = JobRunner(self.client_info, job_info, message_q, self.command_q)
-        self.cancel_signal.set_message({"job_id": job_id, "command": "cancel"})
+        runner = JobRunner(self.client_info, job_info, message_q, self.command_q,
+                check_signals=self._sig.post_message)
+        self._sig.set_message(CANCEL, {"job_id": job_id, "command": "cancel"})
 
         control_q = Queue()
-        updater = ServerUpdater(server, self.client_info, message_q, self.command_q, control_q)
+        done_event = Event()
+        updater = ServerUpdater(server, self.client_info, message_q, self.command_q, control_q, done_event,
+                session=self.session)
+        active_msg = "Job {}: {}".format(job_id, job_info["recipe_name"])
+        idle_msg = "Running job on another server"
         for entry in servers:
-            if entry != server:
-                control_q.put({"server": entry, "message": "Running job on another server"})
-            else:
-                control_q.put({"server": entry, "message": "Job {}: {}".format(job_id, job_info["recipe_name"])})
+            control_q.put({"server": entry, "message": active_msg if entry == server else idle_msg})
 
         updater_thread = Thread(target=ServerUpdater.run, args=(updater,))
-        updater_thread.start();
+        # Don't keep the process alive if the updater can't finish
+        updater_thread.daemon = True
+        updater_thread.start()
         runner.run_job()
         if not runner.stopped and not runner.canceled:
-            logger.info("Joining message_q")
-            message_q.join()
-        control_q.put({"command": "Quit"}) # Any command will stop the ServerUpdater
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Waiting for messages to be sent")
+            message_q.put(ServerUpdater.FINISHED)
+            done_event.wait()
+        updater.stop()
 
         # We want to wait for a little while here, if necessary.
         # It could be that the server is temporarily down and if
         # we just wait long enough for it to come back we can finish cleanly.
         # However, we don't want to hang forever.
-        logger.info("Joining ServerUpdater")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Joining ServerUpdater")
         updater_thread.join(self.thread_join_wait)
-        if updater_thread.isAlive():
+        if updater_thread.is_alive():
             logger.warning("Failed to join ServerUpdater thread. Job {}: '{}' not updated correctly".format(
                 job_id, job_info["recipe_name"]))
-        self.command_q.queue.clear()
+        drain_queue(self.command_q)
         self.runner_error = runner.error
 
+    def wait_for_poll(self):
+        """
+        Waits for the poll time, returning early if a signal is received.
+        """
+        if self._sig.flags:
+            return
+        if self._wake_r is None:
+            time.sleep(self.client_info["poll"])
+            return
+        try:
+            select.select([self._wake_r], [], [], self.client_info["poll"])
+        except select.error:
+            # Python 2 doesn't retry on EINTR
+            pass
+        self._drain_wakeup()
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wake_r, 512):
+                pass
+        except OSError:
+            pass
+
     def run(self):
         """
         Main client loop. Polls the server for jobs and runs them.
@@ -192,17 +312,16 @@ class BaseClient(object):
         while True:
             do_poll = True
             try:
-                getter = JobGetter(self.client_info)
-                claimed = getter.find_job()
+                claimed = self.job_getter.find_job()
                 if claimed:
                     server = self.client_info["server"]
                     self.run_claimed_job(server, [server], claimed)
                     # finished the job, look for a new one immediately
                     do_poll = False
             except Exception:
-                logger.warning("Error: %s" % traceback.format_exc())
+                logger.warning("Error in main loop", exc_info=True)
 
-            if self.cancel_signal.triggered or self.graceful_signal.triggered:
+            if self._sig.flags:
                 logger.info("Received signal...exiting")
                 break
 
@@ -214,4 +333,4 @@ class BaseClient(object):
                 break
 
             if do_poll:
-                time.sleep(self.client_info["poll"])
+                self.wait_for_poll()
@@ -16,8 +16,6 @@
 from __future__ import unicode_literals, absolute_import
 from client import BaseClient, Modules, settings
 import os
-import time, traceback
-from client.JobGetter import JobGetter
 import logging
 logger = logging.getLogger("civet_client")
 
@@ -43,8 +41,7 @@ class INLClient(BaseClient.BaseClient):
         self.client_info["server"] = server[0]
         self.client_info["build_key"] = server[1]
         self.client_info["ssl_verify"] = server[2]
-        getter = JobGetter(self.client_info)
-        claimed = getter.find_job()
+        claimed = self.job_getter.find_job()
         if claimed:
             load_modules = settings.CONFIG_MODULES[claimed['config']]
             os.environ["CIVET_LOADED_MODULES"] = ' '.join(load_modules)
@@ -104,16 +101,16 @@ class INLClient(BaseClient.BaseClient):
         while True:
             ran_job = False
             for server in settings.SERVERS:
-                if self.cancel_signal.triggered or self.graceful_signal.triggered or self.runner_error:
+                if self._sig.flags or self.runner_error:
                     break
                 try:
                     if self.check_server(server):
                         ran_job = True
                 except Exception:
-                    logger.debug("Error: %s" % traceback.format_exc())
+                    logger.debug("Error checking server %s", server[0], exc_info=True)
                     break
 
-            if self.cancel_signal.triggered or self.graceful_signal.triggered:
+            if self._sig.flags:
                 logger.info("Received signal...exiting")
                 break
             if self.runner_error:
@@ -122,4 +119,4 @@ class INLClient(BaseClient.BaseClient):
             if single:
                 break
             if not ran_job:
-                time.sleep(self.client_info["poll"])
+                self.wait_for_poll()
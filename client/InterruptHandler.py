@@ -16,29 +16,72 @@
 from __future__ import unicode_literals, absolute_import
 import signal
 
+# Bits set in InterruptHandler.flags
+CANCEL = 1
+GRACEFUL = 2
+
 class InterruptHandler(object):
-    def __init__(self, message_q, sig=[]):
-        self.sig = sig
+    def __init__(self, message_q):
+        """
+        Input:
+          message_q: Queue to put messages on when a signal is received
+        """
         self.message_q = message_q
-        self.message = None
-        self.triggered = False
-
+        # Bits of the signals that have been received
+        self.flags = 0
+        self.messages = {}
+        self.bits = {}
         self.orig_handler = {}
-        for sig in self.sig:
-            self.orig_handler[sig] = signal.getsignal(sig)
+        # Number of signals received for each bit. Only the signal handler writes this.
+        self._received = {}
+        # Number of those that post_message() has dealt with. Only post_message() writes this.
+        self._posted = {}
 
-        def handler(signum, sigframe):
-            if self.message:
-                self.message_q.put(self.message)
-            self.triggered = True
+    def handler(self, signum, sigframe):
+        # Only set flags here. Putting on the queue would take its lock, which
+        # deadlocks if the main thread was interrupted while holding it.
+        # The wakeup fd set by BaseClient wakes up the main loop.
+        bit = self.bits.get(signum, 0)
+        self.flags |= bit
+        self._received[bit] = self._received.get(bit, 0) + 1
 
-        for sig in self.sig:
+    def register(self, sig, bit):
+        """
+        Handle a signal.
+        Input:
+          sig: signal to handle
+          bit: bit to set in flags when the signal is received
+        """
+        self.orig_handler[sig] = signal.getsignal(sig)
+        self.bits[sig] = bit
+        signal.signal(sig, self.handler)
+
+    def restore(self):
+        """
+        Put back the handlers that were installed before register().
+        """
+        for sig, handler in self.orig_handler.items():
             signal.signal(sig, handler)
+        self.orig_handler = {}
+        self.bits = {}
 
-    def set_message(self, msg):
-        self.message = msg
+    def set_message(self, bit, msg):
+        """
+        Set the message to post when a signal for bit is received.
+        """
+        self.messages[bit] = msg
 
-# This can be used if you need to use this with "with"
-#  def __exit__(self, type, value, tb):
-#    for sig in self.sig:
-#      signal.signal(sig, self.original_handler[sig])
+    def post_message(self):
+        """
+        For each signal bit received since the last call, put its
+        message on the queue. This needs to be called from normal
+        code, not from the signal handler.
+        """
+        for bit, msg in self.messages.items():
+            # Only read what the handler writes. A signal that lands after
+            # the read bumps the count again and gets posted on the next call.
+            received = self._received.get(bit, 0)
+            if received != self._posted.get(bit, 0):
+                self._posted[bit] = received
+                if msg:
+                    self.message_q.put(msg)
@@ -15,7 +15,6 @@
 
 from __future__ import unicode_literals, absolute_import
 import requests
-import traceback
 import json
 import logging
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -24,7 +23,7 @@ requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 logger = logging.getLogger("civet_client")
 
 class JobGetter(object):
-    def __init__(self, client_info):
+    def __init__(self, client_info, session=None):
         """
         Input:
           client_info: A dictionary containing the following keys
@@ -34,9 +33,11 @@ class JobGetter(object):
             ssl_verify: Whether to use SSL verification when making a request.
             request_timeout: The timeout when making a request
             build_key: The build_key to be used.
+          session: requests.Session to reuse connections. If None then the requests module is used.
         """
         super(JobGetter, self).__init__()
         self.client_info = client_info
+        self._session = session if session is not None else requests
         self._headers = {b"User-Agent": b"INL-CIVET-Client/1.0 (+https://github.com/idaholab/civet)"}
 
     def find_job(self):
@@ -69,7 +70,7 @@ class JobGetter(object):
 
         logger.debug('Trying to get jobs at {}'.format(job_url))
         try:
-            response = requests.get(job_url,
+            response = self._session.get(job_url,
                     headers=self._headers,
                     verify=self.client_info["ssl_verify"],
                     timeout=self.client_info.get("request_timeout", 30))
@@ -114,7 +115,7 @@ class JobGetter(object):
                         config,
                         self.client_info["client_name"])
                 in_json = json.dumps(claim_json, separators=(',', ': '))
-                response = requests.post(url,
+                response = self._session.post(url,
                         in_json,
                         headers=self._headers,
                         verify=self.client_info["ssl_verify"],
@@ -129,7 +130,7 @@ class JobGetter(object):
                 else:
                     logger.info("Failed to claim job %s. Response: %s" % (job['id'], claim))
             except Exception:
-                logger.warning('Tried and failed to claim job %s. Error: %s' % (job['id'], traceback.format_exc()))
+                logger.warning('Tried and failed to claim job %s.', job['id'], exc_info=True)
 
         logger.info('No jobs to run')
         return None
@@ -47,7 +47,7 @@ def temp_file(*args, **kwargs):
         os.unlink(f.name)
 
 class JobRunner(object):
-    def __init__(self, client_info, job, message_q, command_q):
+    def __init__(self, client_info, job, message_q, command_q, check_signals=None):
         """
         Input:
           client_info: A dictionary containing the following keys:
@@ -61,9 +61,11 @@ class JobRunner(object):
           job: A dictionary holding the job information
           message_q: A Queue to add messages to that will be sent to the server.
           command_q: A Queue to read commands from the server.
+          check_signals: Called before reading command_q so that received signals can add their commands.
         """
         self.message_q = message_q
         self.command_q = command_q
+        self.check_signals = check_signals
         self.client_info = client_info
         self.job_data = job
         self.canceled = False
@@ -233,6 +235,8 @@ class JobRunner(object):
         This will read ALL of the commands from the queue.
         If the command is for another job it will be dropped.
         """
+        if self.check_signals:
+            self.check_signals()
         try:
             while True:
                 cmd = self.command_q.get(block=False)
@@ -491,7 +495,7 @@ class JobRunner(object):
                 proc.wait() # To get the returncode set
         except Exception:
             # This shouldn't really happend but if it does just kill it.
-            logger.info("Caught exception while running job {}\nError:{}\n".format(step_data['job_id'], traceback.format_exc()))
+            logger.info("Caught exception while running job %s", step_data['job_id'], exc_info=True)
             self.kill_job(proc)
             step_data['canceled'] = True
             self.canceled = True
@@ -17,8 +17,8 @@ from __future__ import unicode_literals, absolute_import
 import sys
 import time
 import json, requests
-import traceback
 import logging
+import threading
 
 try:
     from queue import Empty
@@ -34,10 +34,22 @@ class StopException(Exception):
     pass
 
 class ServerUpdater(object):
-    def __init__(self, server, client_info, message_q, command_q, control_q):
+    # Put on the message queue after the last message of a job.
+    # done_event gets set once everything before it has been sent.
+    FINISHED = None
+
+    def __init__(self, server, client_info, message_q, command_q, control_q, done_event=None, session=None):
         self.message_q = message_q
+        # requests.Session to reuse connections. If None then the requests module is used.
+        self._session = session if session is not None else requests
         self.command_q = command_q
         self.control_q = control_q
+        if done_event is None:
+            done_event = threading.Event()
+        self.done_event = done_event
+        # Set by stop() to tell the run loop to finish up
+        self.stop_event = threading.Event()
+        self.finished = False
         self.messages = []
         self.client_info = client_info
         self.servers = {}
@@ -64,14 +76,13 @@ class ServerUpdater(object):
         This is intended to be called like
         Thread(target=ServerUpdater.run, args=(updater,))
         where updater is a ServerUpdater instance.
-        Adding anything to the control queue will cause
-        an exit.
+        Calling updater.stop() will cause an exit.
 
         Input:
           updater: A ServerUpdater instance
         """
 
-        while updater.running:
+        while updater.running and not updater.stop_event.is_set():
             updater.read_queue()
             updater.send_messages()
             updater.ping_servers()
@@ -82,6 +93,15 @@ class ServerUpdater(object):
         updater.send_messages()
         sys.exit(0)
 
+    def stop(self):
+        """
+        Tell the run loop to send any remaining messages and exit.
+        This is intended to be called from another thread.
+        """
+        self.stop_event.set()
+        # Wake up read_queue() if it is waiting for a message
+        self.message_q.put(self.FINISHED)
+
     def update_server_message(self, server, msg):
         """
         Updates the message we send to the server on pings.
@@ -94,17 +114,20 @@ class ServerUpdater(object):
     def check_control(self):
         """
         If the parent process wants us to stop then
-        they will add something to the control queue
+        they will add something to the control queue.
+        All the pending control messages are read. Only the
+        last message for each server matters anyway.
         """
         try:
-            msg = self.control_q.get(block=False)
-            if isinstance(msg, dict) and "server" in msg:
-                if "message" in msg:
-                    self.update_server_message(msg["server"], msg["message"])
-            else:
-                # Anything else on the queue and we stop
-                logger.info("ServerUpdater shutting down")
-                self.running = False
+            while True:
+                msg = self.control_q.get(block=False)
+                if isinstance(msg, dict) and "server" in msg:
+                    if "message" in msg:
+                        self.update_server_message(msg["server"], msg["message"])
+                else:
+                    # Anything else on the queue and we stop
+                    logger.info("ServerUpdater shutting down")
+                    self.running = False
         except Empty:
             pass
 
@@ -124,12 +147,47 @@ class ServerUpdater(object):
             block = True
             while True:
                 item = self.message_q.get(block=block, timeout=timeout)
-                self.messages.append(item)
+                if item is self.FINISHED:
+                    self.finished = True
+                elif self.messages and self.can_merge(self.messages[-1], item):
+                    self.messages[-1] = self.merge_messages(self.messages[-1], item)
+                else:
+                    self.messages.append(item)
                 # if we have an item we don't want to block on the next iteration
                 block = False
         except Empty:
             pass
 
+    @staticmethod
+    def can_merge(prev, item):
+        """
+        Output updates for the same step can be combined into one post since
+        the server just appends the output.
+        Input:
+          prev: dict: Message that hasn't been sent yet
+          item: dict: The next message
+        Return:
+          bool: Whether item can be merged into prev
+        """
+        return (prev["url"] == item["url"]
+                and "/update_step_result/" in item["url"]
+                and "output" in prev["payload"]
+                and "output" in item["payload"]
+                and type(prev["payload"]["output"]) == type(item["payload"]["output"]))
+
+    @staticmethod
+    def merge_messages(prev, item):
+        """
+        Combine two step updates. The output is concatenated and
+        everything else comes from the newer message.
+        Return:
+          dict: The combined message
+        """
+        merged = item.copy()
+        merged["payload"] = item["payload"].copy()
+        merged["payload"]["output"] = prev["payload"]["output"] + item["payload"]["output"]
+        return merged
+
     def send_messages(self):
         """
         Just tries to clear the messages that we haven't sent yet.
@@ -140,15 +198,13 @@ class ServerUpdater(object):
                 sent = self.post_message(msg)
                 if sent:
                     last_success = idx+1
-                    self.message_q.task_done()
                 else:
                     break
-            #self.messages = self.messages[last_success:]
             self.messages = self.messages[last_success:]
         except StopException:
-            for msg in self.messages[last_success:]:
-                self.message_q.task_done()
             self.messages = []
+        if self.finished and not self.messages:
+            self.done_event.set()
         self.servers[self.main_server]["last_time"] = time.time()
 
     def post_message(self, item):
@@ -230,7 +286,7 @@ class ServerUpdater(object):
             # See https://github.com/urllib3/urllib3/issues/855
             return in_json.encode("utf-8", "replace"), True
         except Exception:
-            logger.warning("Failed to convert to json: \n%s\nData:%s" % (traceback.format_exc(), data))
+            logger.warning("Failed to convert to json.\nData:%s", data, exc_info=True)
             return {"status": "OK", "command": "stop"}, False
 
     def post_json(self, request_url, data):
@@ -250,7 +306,7 @@ class ServerUpdater(object):
             in_json, good = self.data_to_json(data)
             if not good:
                 return in_json
-            response = requests.post(request_url,
+            response = self._session.post(request_url,
                     in_json,
                     headers=self._headers,
                     verify=self.client_info["ssl_verify"],
@@ -278,5 +334,5 @@ class ServerUpdater(object):
             reply = response.json()
             return reply
         except Exception:
-            logger.warning("Failed to POST at {}.\nError: {}".format(request_url, traceback.format_exc()))
+            logger.warning("Failed to POST at %s.", request_url, exc_info=True)
             return None
@@ -16,14 +16,21 @@
 from __future__ import unicode_literals, absolute_import
 from django.test import SimpleTestCase
 from django.test import override_settings
-from client import BaseClient
+from client import BaseClient, InterruptHandler
 from client.tests import utils
 from ci.tests import utils as test_utils
+import os, signal, subprocess, time
+import logging
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
 
 @override_settings(INSTALLED_GITSERVERS=[test_utils.github_config()])
 class Tests(SimpleTestCase):
     def test_log_dir(self):
         c = utils.create_base_client()
+        self.addCleanup(c.close)
         self.assertIn(c.client_info["client_name"], c.client_info["log_file"])
         # dir exists but can't write
         with self.assertRaises(BaseClient.ClientException):
@@ -46,6 +53,7 @@ class Tests(SimpleTestCase):
 
     def test_log_file(self):
         c = utils.create_base_client(log_file="test_log")
+        self.addCleanup(c.close)
         self.assertIn('test_log', c.client_info["log_file"])
 
         # can't write
@@ -58,3 +66,53 @@ class Tests(SimpleTestCase):
 
         # not set, should just return
         c.set_log_file("")
+
+    def test_wait_for_poll(self):
+        c = utils.create_base_client()
+        self.addCleanup(c.close)
+        c.client_info["poll"] = 60
+        # A signal should wake us up well before the poll time
+        proc = subprocess.Popen("sleep 1 && kill -USR2 %s" % os.getpid(), shell=True, executable="/bin/bash")
+        start = time.time()
+        c.wait_for_poll()
+        proc.wait()
+        self.assertEqual(c._sig.flags, InterruptHandler.GRACEFUL)
+        self.assertLess(time.time() - start, 3)
+
+        # Already triggered so don't wait at all
+        start = time.time()
+        c.wait_for_poll()
+        self.assertLess(time.time() - start, 1)
+
+    def test_close(self):
+        prev = signal.set_wakeup_fd(-1)
+        signal.set_wakeup_fd(prev)
+        orig = signal.getsignal(signal.SIGUSR2)
+        c = utils.create_base_client()
+        self.addCleanup(c.close)
+        self.assertIsNotNone(c._wake_r)
+        c.close()
+        self.assertIsNone(c._wake_r)
+        # The wakeup fd from before the client is back
+        self.assertEqual(signal.set_wakeup_fd(prev), prev)
+        # The signal handlers are put back too
+        self.assertEqual(signal.getsignal(signal.SIGUSR2), orig)
+        # Already closed, does nothing
+        c.close()
+
+    def test_drain_queue(self):
+        q = Queue()
+        q.put("foo")
+        q.put("bar")
+        BaseClient.drain_queue(q)
+        self.assertTrue(q.empty())
+        # Nothing is left unfinished so this doesn't block
+        q.join()
+
+    def test_setup_logger(self):
+        BaseClient.setup_logger()
+        self.assertTrue(BaseClient.has_handler(logging.StreamHandler))
+        num = len(BaseClient.logger.handlers)
+        # Calling it again doesn't add another handler
+        BaseClient.setup_logger()
+        self.assertEqual(len(BaseClient.logger.handlers), num)
@@ -14,7 +14,7 @@
 # limitations under the License.
 
 from __future__ import unicode_literals, absolute_import
-from client import JobGetter
+from client import JobGetter, InterruptHandler
 from django.test import override_settings
 from mock import patch
 import os, subprocess
@@ -28,6 +28,7 @@ from client.tests import LiveClientTester, utils
 class Tests(LiveClientTester.LiveClientTester):
     def create_client_and_job(self, recipe_dir, name, sleep=1):
         c = utils.create_base_client()
+        self.addCleanup(c.close)
         os.environ["BUILD_ROOT"] = "/foo/bar"
         c.client_info["single_shot"] = True
         c.client_info["update_step_time"] = 1
@@ -70,8 +71,8 @@ class Tests(LiveClientTester.LiveClientTester):
             proc.wait()
             self.compare_counts(num_clients=1, num_events_completed=1, num_jobs_completed=1, active_branches=1)
             utils.check_complete_job(self, job)
-            self.assertEqual(c.graceful_signal.triggered, True)
-            self.assertEqual(c.cancel_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), True)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), False)
 
     def test_run_cancel(self):
         with test_utils.RecipeDir() as recipe_dir:
@@ -91,8 +92,8 @@ class Tests(LiveClientTester.LiveClientTester):
                     active_branches=1,
                     events_canceled=1,
                     )
-            self.assertEqual(c.cancel_signal.triggered, True)
-            self.assertEqual(c.graceful_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), True)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), False)
             utils.check_canceled_job(self, job)
 
     def test_run_job_cancel(self):
@@ -113,8 +114,8 @@ class Tests(LiveClientTester.LiveClientTester):
                     active_branches=1,
                     events_canceled=1,
                     )
-            self.assertEqual(c.cancel_signal.triggered, False)
-            self.assertEqual(c.graceful_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), False)
             utils.check_canceled_job(self, job)
 
     def test_run_job_invalidated_basic(self):
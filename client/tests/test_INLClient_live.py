@@ -18,7 +18,7 @@ import os
 from django.test import override_settings
 from mock import patch
 from client.JobGetter import JobGetter
-from client import settings
+from client import settings, InterruptHandler
 import subprocess
 from client.tests import LiveClientTester, utils
 import threading
@@ -30,6 +30,7 @@ from ci.tests import utils as test_utils
 class Tests(LiveClientTester.LiveClientTester):
     def create_client_and_job(self, recipes_dir, name, sleep=1):
         c = utils.create_inl_client()
+        self.addCleanup(c.close)
         os.environ["BUILD_ROOT"] = "/foo/bar"
         c.client_info["single_shot"] = True
         c.client_info["update_step_time"] = 1
@@ -63,8 +64,8 @@ class Tests(LiveClientTester.LiveClientTester):
             proc.wait()
             self.compare_counts(num_clients=1, num_events_completed=1, num_jobs_completed=1, active_branches=1)
             utils.check_complete_job(self, job)
-            self.assertEqual(c.graceful_signal.triggered, True)
-            self.assertEqual(c.cancel_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), True)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), False)
 
     def test_run_cancel(self):
         with test_utils.RecipeDir() as recipe_dir:
@@ -77,8 +78,8 @@ class Tests(LiveClientTester.LiveClientTester):
             c.run()
             proc.wait()
             self.compare_counts(num_clients=1, canceled=1, num_events_completed=1, num_jobs_completed=1, active_branches=1, events_canceled=1)
-            self.assertEqual(c.cancel_signal.triggered, True)
-            self.assertEqual(c.graceful_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), True)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), False)
             utils.check_canceled_job(self, job)
 
     def test_run_job_cancel(self):
@@ -93,8 +94,8 @@ class Tests(LiveClientTester.LiveClientTester):
             views.set_job_canceled(job)
             thread.join()
             self.compare_counts(num_clients=1, canceled=1, num_events_completed=1, num_jobs_completed=1, active_branches=1, events_canceled=1)
-            self.assertEqual(c.cancel_signal.triggered, False)
-            self.assertEqual(c.graceful_signal.triggered, False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.CANCEL), False)
+            self.assertEqual(bool(c._sig.flags & InterruptHandler.GRACEFUL), False)
             utils.check_canceled_job(self, job)
 
     def test_run_job_invalidated_basic(self):
@@ -28,14 +28,51 @@ except ImportError:
 class InterruptHandlerTests(SimpleTestCase):
     def test_handler(self):
         q = Queue()
-        i = InterruptHandler.InterruptHandler(q, sig=[signal.SIGUSR1])
-        i.set_message("hi")
-        self.assertEqual(i.triggered, False)
+        orig = signal.getsignal(signal.SIGUSR1)
+        i = InterruptHandler.InterruptHandler(q)
+        self.addCleanup(i.restore)
+        i.register(signal.SIGUSR1, InterruptHandler.CANCEL)
+        i.register(signal.SIGUSR2, InterruptHandler.GRACEFUL)
+        i.set_message(InterruptHandler.CANCEL, "hi")
+        self.assertEqual(i.flags, 0)
 
         script = "sleep 1 && kill -USR1 %s" % os.getpid()
         proc = subprocess.Popen(script, shell=True, executable="/bin/bash", stdout=subprocess.PIPE)
         proc.wait()
-        self.assertEqual(i.triggered, True)
+        self.assertEqual(i.flags, InterruptHandler.CANCEL)
+        # The handler doesn't touch the queue
+        self.assertEqual(q.qsize(), 0)
+        i.post_message()
         self.assertEqual(q.qsize(), 1)
         msg = q.get(block=False)
         self.assertEqual(msg, "hi")
+        # Only posted once per signal
+        i.post_message()
+        self.assertEqual(q.qsize(), 0)
+
+        # No message for graceful, just the flag
+        script = "sleep 1 && kill -USR2 %s" % os.getpid()
+        proc = subprocess.Popen(script, shell=True, executable="/bin/bash", stdout=subprocess.PIPE)
+        proc.wait()
+        self.assertEqual(i.flags, InterruptHandler.CANCEL | InterruptHandler.GRACEFUL)
+        i.post_message()
+        self.assertEqual(q.qsize(), 0)
+
+        i.restore()
+        self.assertEqual(signal.getsignal(signal.SIGUSR1), orig)
+
+    def test_post_message(self):
+        q = Queue()
+        i = InterruptHandler.InterruptHandler(q)
+        i.set_message(InterruptHandler.CANCEL, "hi")
+        i.bits[signal.SIGUSR1] = InterruptHandler.CANCEL
+        # Two signals before a post only post once
+        i.handler(signal.SIGUSR1, None)
+        i.handler(signal.SIGUSR1, None)
+        i.post_message()
+        self.assertEqual(q.qsize(), 1)
+        q.get(block=False)
+        # A signal after the post is posted next time
+        i.handler(signal.SIGUSR1, None)
+        i.post_message()
+        self.assertEqual(q.qsize(), 1)
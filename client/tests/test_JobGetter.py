@@ -30,6 +30,15 @@ class Tests(DBTester.DBTester):
         getter = JobGetter.JobGetter(self.client_info)
         return getter
 
+    @patch.object(requests.Session, 'get')
+    def test_session(self, mock_get):
+        self.client_info = utils.default_client_info()
+        g = JobGetter.JobGetter(self.client_info, session=requests.Session())
+        job_response = {"jobs": "jobs"}
+        mock_get.return_value = test_utils.Response(job_response)
+        self.assertEqual(g.get_possible_jobs(), job_response["jobs"])
+        self.assertEqual(mock_get.call_count, 1)
+
     @patch.object(requests, 'get')
     def test_get_possible_jobs(self, mock_get):
         g = self.create_getter()
@@ -79,8 +79,12 @@ class Tests(SimpleTestCase):
         # One call to send the update to the server
         # and one call to ping the other server
         # Depending on the timing though there might be another ping
-        self.message_q.join()
-        self.control_q.put("Quit")
+        self.message_q.put(ServerUpdater.ServerUpdater.FINISHED)
+        self.assertTrue(u.done_event.wait(10))
+        u.stop()
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.thread = None
         self.assertIn(mock_post.call_count, [2,3])
 
     def test_check_control(self):
@@ -120,6 +124,30 @@ class Tests(SimpleTestCase):
         self.assertEqual(u.messages, [item, item, item])
         self.assertEqual(u.message_q.qsize(), 0)
 
+    def test_read_queue_merge(self):
+        u = self.create_updater()
+        url = "server/client/update_step_result/123/client/1/"
+        other_url = "server/client/complete_step_result/123/client/1/"
+        for i in range(3):
+            item = {"server": u.main_server, "job_id": 0, "url": url, "payload": {"output": "out%s\n" % i, "time": i}}
+            self.message_q.put(item)
+        complete = {"server": u.main_server, "job_id": 0, "url": other_url, "payload": {"output": "all", "time": 3}}
+        self.message_q.put(complete)
+        u.read_queue()
+        # The updates get combined but the complete message is separate
+        self.assertEqual(len(u.messages), 2)
+        self.assertEqual(u.messages[0]["url"], url)
+        self.assertEqual(u.messages[0]["payload"], {"output": "out0\nout1\nout2\n", "time": 2})
+        self.assertEqual(u.messages[1], complete)
+
+        # Control messages are all read at once
+        self.control_q.put({"server": u.main_server, "message": "first"})
+        self.control_q.put({"server": u.main_server, "message": "second"})
+        u.check_control()
+        self.assertEqual(u.servers[u.main_server]["msg"], "second")
+        self.assertEqual(u.control_q.qsize(), 0)
+        self.assertEqual(u.running, True)
+
     def load_messages(self, u ):
         items = []
         u.messages = []
@@ -142,6 +170,28 @@ class Tests(SimpleTestCase):
         self.assertEqual(u.messages, [])
         self.assertEqual(mock_post.call_count, 3)
 
+    @patch.object(requests, 'post')
+    def test_done_event(self, mock_post):
+        u = self.create_updater()
+        self.load_messages(u)
+        u.message_q.put(ServerUpdater.ServerUpdater.FINISHED)
+        u.read_queue()
+        self.assertTrue(u.finished)
+        self.assertEqual(len(u.messages), 3)
+
+        # Not all the messages got sent
+        response_data = {"status": "OK"}
+        mock_post.side_effect = [test_utils.Response(response_data), test_utils.Response(response_data, do_raise=True)]
+        u.send_messages()
+        self.assertEqual(len(u.messages), 2)
+        self.assertFalse(u.done_event.is_set())
+
+        mock_post.side_effect = None
+        mock_post.return_value = test_utils.Response(response_data)
+        u.send_messages()
+        self.assertEqual(u.messages, [])
+        self.assertTrue(u.done_event.is_set())
+
     @patch.object(requests, 'post')
     def test_send_messages_400(self, mock_post):
         u = self.create_updater()
@@ -93,6 +93,7 @@ class CommandlineClientTests(SimpleTestCase):
 
     def test_call_daemon(self):
         c = utils.create_base_client()
+        self.addCleanup(c.close)
         # do it like this because it seems mock uses the
         # same instance across calls. so, for example, once start
         # is set it will stay set when we call 'call_daemon' again